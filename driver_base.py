@@ -2,11 +2,388 @@
 """
 wM-Bus cihaz sürücüleri için temel sınıf.
 Her cihaz sürücüsü bu sınıftan türetilmelidir.
+
+Sürücüler alanlarını FIELDS ile bildirimsel olarak tanımlayabilir:
+PayloadField ham payload içindeki sabit konumlu alanları, BlockField DIF/VIF
+veri bloklarını seçer. Tanımlar sürücü sınıfı başına bir kez derlenir; sabit
+konumlu alanlar tek bir struct.Struct.unpack_from çağrısıyla okunur.
+
+Sürücü örnekleri durumsuzdur: DriverManager her sürücüden tek bir örnek
+oluşturup tüm telgraflarda (ve thread'lerde) paylaşır. Telgrafa ait durum
+(sonuç sözlüğü, payload, veri blokları) DriverContext nesnesinde taşınır ve
+parse(ctx) ile sürücüye verilir.
 """
 
+import struct
 from abc import ABC, abstractmethod
+from collections import namedtuple
 from datetime import datetime
 
+
+# Ham payload içinde sabit konumlu alan.
+#   encoding: "uint" / "int" (little endian), "uint_be", "bcd" (little endian BCD)
+#             veya "date_ymd" (3 bayt: yıl - 2000, ay, gün; ISO tarih metni)
+#   scale: 10 tabanında üs; değer 10**scale ile çarpılır (-3 -> / 1000)
+#   unit: Bilgi amaçlı birim (field_units ile okunur)
+PayloadField = namedtuple("PayloadField", "name offset width encoding scale unit",
+                          defaults=(4, "uint", 0, None))
+
+# DIF/VIF veri bloğundan okunan alan.
+#   difs: Öncelik sırasıyla DIF değerleri, vifs: her DIF için öncelik sırasıyla VIF değerleri
+#   encoding: "raw" (bloğun değeri), "vif" (değer x VIF çarpanı) veya "formatted"
+#             (birimli değer metni)
+#   scale, unit: PayloadField ile aynı
+BlockField = namedtuple("BlockField", "name difs vifs dife encoding scale unit",
+                        defaults=(None, "vif", 0, None))
+
+# Tek struct kodu olan kodlamalar: (kodlama, genişlik) -> (bayt sırası, kod)
+_STRUCT_CODES = {
+    ("uint", 1): ("<", "B"), ("uint", 2): ("<", "H"), ("uint", 4): ("<", "I"), ("uint", 8): ("<", "Q"),
+    ("int", 1): ("<", "b"), ("int", 2): ("<", "h"), ("int", 4): ("<", "i"), ("int", 8): ("<", "q"),
+    ("uint_be", 1): (">", "B"), ("uint_be", 2): (">", "H"), ("uint_be", 4): (">", "I"), ("uint_be", 8): (">", "Q"),
+}
+
+# Derlenmiş alan çıkarıcıları: (sürücü sınıfı, düzen adı) -> fonksiyon
+_FIELD_EXTRACTORS = {}
+
+
+def _apply_scale(value, scale):
+    if not scale or value is None:
+        return value
+    if scale < 0:
+        return value / 10 ** -scale
+    return value * 10 ** scale
+
+
+def _decode_bcd_le(data):
+    value = 0
+    for byte in reversed(data):
+        value = value * 100 + (byte >> 4) * 10 + (byte & 0x0F)
+    return value
+
+
+def _decode_date_ymd(data):
+    try:
+        return datetime(2000 + (data[0] & 0x7F), data[1] & 0x0F, data[2] & 0x1F).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _compile_payload_field(field):
+    """Tek bir PayloadField için (payload) -> değer fonksiyonu"""
+    offset, width, scale = field.offset, field.width, field.scale
+    end = offset + width
+    if (field.encoding, width) in _STRUCT_CODES:
+        order, code = _STRUCT_CODES[(field.encoding, width)]
+        unpack_from = struct.Struct(order + code).unpack_from
+
+        def decode(payload):
+            return unpack_from(payload, offset)[0]
+    elif field.encoding in ("uint", "int", "uint_be"):
+        byteorder = "big" if field.encoding == "uint_be" else "little"
+        signed = field.encoding == "int"
+
+        def decode(payload):
+            return int.from_bytes(payload[offset:end], byteorder, signed=signed)
+    elif field.encoding == "bcd":
+        def decode(payload):
+            return _decode_bcd_le(payload[offset:end])
+    elif field.encoding == "date_ymd":
+        def decode(payload):
+            return _decode_date_ymd(payload[offset:end])
+    else:
+        raise ValueError(f"Bilinmeyen alan kodlaması: {field.name}: {field.encoding}")
+
+    def extract(payload):
+        if len(payload) < end:
+            return None
+        return _apply_scale(decode(payload), scale)
+    return extract
+
+
+def _compile_struct_group(fields):
+    """
+    Çakışmayan little endian tamsayı alanlarını tek bir struct.Struct'ta birleştir
+
+    Returns:
+        tuple: (struct.Struct veya None, birleştirilen alanlar)
+    """
+    grouped = []
+    fmt = "<"
+    position = 0
+    for field in sorted(fields, key=lambda f: f.offset):
+        codes = _STRUCT_CODES.get((field.encoding, field.width))
+        if codes is None or codes[0] != "<" or field.offset < position:
+            continue
+        if field.offset > position:
+            fmt += f"{field.offset - position}x"
+        fmt += codes[1]
+        position = field.offset + field.width
+        grouped.append(field)
+    if len(grouped) < 2:
+        return None, []
+    return struct.Struct(fmt), grouped
+
+
+def _compile_block_field(field):
+    """Tek bir BlockField için (bağlam) -> değer fonksiyonu"""
+    difs = (field.difs,) if isinstance(field.difs, (str, int)) else tuple(field.difs)
+    vifs = (field.vifs,) if isinstance(field.vifs, (str, int)) else tuple(field.vifs)
+    dife, encoding, scale = field.dife, field.encoding, field.scale
+    if encoding not in ("raw", "vif", "formatted"):
+        raise ValueError(f"Bilinmeyen blok alanı kodlaması: {field.name}: {encoding}")
+
+    def extract(ctx):
+        for dif in difs:
+            block = ctx.find_first_block(dif, vifs, dife)
+            if block:
+                if encoding == "formatted":
+                    return block["formatted_value"]
+                value = block["value"]
+                if encoding == "vif":
+                    value = value * block["vif"]["info"]["multiplier"]
+                return _apply_scale(value, scale)
+        return None
+    return extract
+
+
+def compile_fields(fields):
+    """
+    Alan tanımlarını tek bir çıkarıcı fonksiyona derle
+
+    Returns:
+        function: (payload, bağlam) -> {alan adı: değer} (tanım sırasıyla;
+                  payload kısa ya da blok yoksa değer None)
+    """
+    fields = tuple(fields)
+    payload_fields = [f for f in fields if isinstance(f, PayloadField)]
+    group, grouped = _compile_struct_group(payload_fields)
+    grouped_names = [f.name for f in grouped]
+    grouped_scales = [f.scale for f in grouped]
+
+    steps = []
+    for field in fields:
+        if isinstance(field, PayloadField):
+            steps.append((field.name, True, None if field in grouped else _compile_payload_field(field)))
+        elif isinstance(field, BlockField):
+            steps.append((field.name, False, _compile_block_field(field)))
+        else:
+            raise TypeError(f"Geçersiz alan tanımı: {field!r}")
+    fallbacks = {f.name: _compile_payload_field(f) for f in grouped}
+
+    def extract(payload, ctx):
+        grouped_values = {}
+        if group is not None and payload is not None:
+            if len(payload) >= group.size:
+                grouped_values = dict(zip(grouped_names, map(_apply_scale, group.unpack_from(payload), grouped_scales)))
+            else:
+                # Payload tüm grubu kapsamıyor: alanlar tek tek okunur
+                grouped_values = {name: fallbacks[name](payload) for name in grouped_names}
+        values = {}
+        for name, from_payload, step in steps:
+            if not from_payload:
+                values[name] = step(ctx)
+            elif payload is None:
+                values[name] = None
+            elif step is None:
+                values[name] = grouped_values[name]
+            else:
+                values[name] = step(payload)
+        return values
+    return extract
+
+
+def _byte_value(value):
+    """DIF/VIF/DIFE değerini tamsayıya çevir ("0x0b" veya 0x0b)"""
+    return int(value, 16) if isinstance(value, str) else value
+
+
+def block_key(block):
+    """
+    Veri bloğunun indeks anahtarı: (DIF, VIF, DIFE baytları) tamsayı olarak
+    
+    Hem sözlük biçimindeki bloklar hem kompakt DataBlock nesneleri desteklenir.
+    """
+    if isinstance(block, dict):
+        return (
+            int(block["dif"]["byte"], 16),
+            int(block["vif"]["byte"], 16),
+            tuple(int(d["byte"], 16) for d in block.get("dife") or ())
+        )
+    return (block.dif, block.vif, tuple(block.dife or ()))
+
+
+def build_block_index(blocks):
+    """
+    Bloklar için (DIF, VIF, DIFE) -> blok sırası indeksi kur
+    
+    Aynı anahtarlı bloklardan ilki tutulur. DIFE'li bloklar ayrıca her DIFE
+    baytı için (DIF, VIF, (DIFE,)) anahtarıyla da eklenir; böylece tek DIFE
+    ile arama, o baytı içeren ilk bloğu bulur.
+    """
+    index = {}
+    for position, block in enumerate(blocks):
+        key = block_key(block)
+        index.setdefault(key, position)
+        dif, vif, dife = key
+        if len(dife) > 1:
+            for dife_byte in dife:
+                index.setdefault((dif, vif, (dife_byte,)), position)
+    return index
+
+
+def telegram_payload(telegram_data):
+    """
+    Telgrafın çözülmüş payload'ını bytes olarak döndürür.
+    
+    Çözümleyicinin TelegramResult sonuçları payload'ı zaten bytes olarak
+    taşır; hex metin yalnızca elle oluşturulmuş sözlükler için çözülür.
+    """
+    payload = getattr(telegram_data, "payload", None)
+    if payload is not None:
+        return payload
+    raw_payload = telegram_data.get("raw_payload")
+    if isinstance(raw_payload, str):
+        try:
+            return bytes.fromhex(raw_payload)
+        except ValueError:
+            return None
+    if raw_payload is not None:
+        return bytes(raw_payload)
+    return None
+
+
+class DriverContext:
+    """
+    Tek bir telgrafın sürücü çözümlemesi sırasındaki durumu.
+    
+    Sürücü örnekleri paylaşıldığı için telgrafa ait her şey bu nesnede
+    tutulur; blok arama yardımcıları da buradadır. Blok indeksi ilk blok
+    aramasında kurulur, yalnızca payload okuyan sürücüler için hiç kurulmaz.
+    
+    Args:
+        telegram_data: Çözümleyici sonucu
+        payload: Çözülmüş payload (bytes); verilmezse telegram_data'dan alınır
+    """
+    __slots__ = ("telegram_data", "telegram_info", "data_blocks", "block_index", "payload", "result")
+    
+    def __init__(self, telegram_data, payload=None):
+        self.telegram_data = telegram_data
+        self.telegram_info = telegram_data.get("telegram_info", {})
+        self.data_blocks = telegram_data.get("data_blocks", [])
+        self.block_index = None
+        if payload is None:
+            payload = telegram_payload(telegram_data)
+        elif not isinstance(payload, bytes):
+            payload = bytes(payload)
+        self.payload = payload
+        self.result = {}
+    
+    def _index_blocks(self):
+        # İndeks kompakt bloklardan kurulur (baytlar zaten tamsayı), ardından
+        # bloklar sözlük biçimine çevrilir (find_block sözlük döndürür)
+        blocks = self.data_blocks
+        self.block_index = build_block_index(blocks)
+        if blocks and not isinstance(blocks[0], dict):
+            self.data_blocks = [block.to_dict() for block in blocks]
+    
+    def find_block(self, dif, vif, dife=None):
+        """
+        Belirli bir DIF/VIF kombinasyonuna sahip veri bloğunu bulur.
+        
+        Args:
+            dif: DIF değeri (örn: "0x0b" veya 0x0b)
+            vif: VIF değeri (örn: "0x6e" veya 0x6e)
+            dife: DIFE değeri (opsiyonel); tek bayt verilirse bu baytı içeren,
+                  demet verilirse DIFE baytları tam olarak eşleşen blok aranır.
+                  Verilmezse yalnızca DIFE'siz bloklar eşleşir.
+            
+        Returns:
+            dict or None: Bulunan veri bloğu veya hiçbiri bulunamazsa None
+        """
+        if self.block_index is None:
+            self._index_blocks()
+        
+        if dife is None or dife == "":
+            dife_key = ()
+        elif isinstance(dife, (tuple, list)):
+            dife_key = tuple(_byte_value(d) for d in dife)
+        else:
+            dife_key = (_byte_value(dife),)
+        
+        position = self.block_index.get((_byte_value(dif), _byte_value(vif), dife_key))
+        if position is None:
+            return None
+        return self.data_blocks[position]
+    
+    def find_first_block(self, dif, vifs, dife=None):
+        """
+        Verilen VIF'lerden (sırayla) ilk bulunanın veri bloğunu döndürür.
+        
+        Args:
+            dif: DIF değeri
+            vifs: Denenecek VIF değerleri (öncelik sırasıyla)
+            dife: DIFE değeri (opsiyonel, find_block ile aynı)
+            
+        Returns:
+            dict or None: Bulunan ilk veri bloğu veya None
+        """
+        for vif in vifs:
+            block = self.find_block(dif, vif, dife)
+            if block:
+                return block
+        return None
+    
+    def get_block_value(self, dif, vif, dife=None, default=None):
+        """
+        Belirli bir DIF/VIF kombinasyonuna sahip bloğun değerini döndürür.
+        
+        Args:
+            dif: DIF değeri (örn: "0x0b")
+            vif: VIF değeri (örn: "0x6e")
+            dife: DIFE değeri (opsiyonel)
+            default: Blok bulunamazsa dönecek varsayılan değer
+            
+        Returns:
+            Bloğun değeri veya blok bulunamazsa default değeri
+        """
+        block = self.find_block(dif, vif, dife)
+        if block:
+            return block["value"]
+        return default
+    
+    def find_record(self, dif, vif, length, payload=None):
+        """
+        Ham payload içinde DIF/VIF bayt çiftini bytes.find ile arar.
+        
+        Üreticiye özel (DIF/VIF blok yapısı çözümlenmemiş) payload'lardaki
+        kayıtlar için kullanılır; arama C seviyesinde yapılır ve payload
+        sonunun ötesi okunmaz.
+        
+        Args:
+            dif: DIF baytı (örn: 0x04 veya "0x04")
+            vif: VIF baytı
+            length: DIF/VIF'ten sonra okunacak veri uzunluğu
+            payload: Aranacak veri (verilmezse bağlamın payload'ı)
+            
+        Returns:
+            bytes or None: İlk eşleşmenin veri baytları; eşleşme yoksa veya
+                           veri payload'a sığmıyorsa None
+        """
+        if payload is None:
+            payload = self.payload
+        if not payload:
+            return None
+        needle = bytes((_byte_value(dif), _byte_value(vif)))
+        position = payload.find(needle)
+        while position >= 0:
+            start = position + 2
+            if start + length <= len(payload):
+                return payload[start:start + length]
+            position = payload.find(needle, position + 1)
+        return None
+
+
 class WMBusDriverBase(ABC):
     """
     wM-Bus sürücülerinin temel sınıfı.
@@ -16,15 +393,41 @@ class WMBusDriverBase(ABC):
     MANUFACTURER_ID = None  # Üretici kodu (örn: "0x4493")
     DEVICE_TYPE = None      # Cihaz tipi (örn: 0x08)
     
-    def __init__(self, telegram_parser):
+    # Statik eşleşme anahtarları: (üretici kodu, cihaz tipi, versiyon, CI alanı)
+    # dörtlüleri, None her değerle eşleşir (örn: ("0x5068", 0x04, None, None)).
+    # DriverManager bu anahtarlardan karma (hash) tablosu kurar.
+    # MATCH_KEYS None ise MANUFACTURER_ID / DEVICE_TYPE'tan türetilir.
+    MATCH_KEYS = None
+    # Diğer tüm eşleşmelerden önce denenen algılama anahtarları
+    DETECT_KEYS = ()
+    
+    # Bildirimsel alan tanımları (PayloadField / BlockField demeti) veya
+    # birden fazla telgraf düzeni için {düzen adı: demet}
+    FIELDS = ()
+    
+    def __init__(self, telegram_parser=None):
         """
         Args:
             telegram_parser: Telegram çözümleyicisi instance'ı
+        
+        Örnek telgraf durumu tutmaz; aynı örnek eşzamanlı çağrılarda
+        paylaşılabilir (bkz. DriverContext).
         """
         self.telegram_parser = telegram_parser
-        self.telegram_info = {}
-        self.data_blocks = []
-        self.result = {}
+    
+    @classmethod
+    def match_keys(cls):
+        """
+        Sürücünün statik eşleşme anahtarlarını döndürür.
+        
+        Returns:
+            tuple: (üretici kodu, cihaz tipi, versiyon, CI alanı) dörtlüleri
+        """
+        if cls.MATCH_KEYS is not None:
+            return tuple(tuple(key) for key in cls.MATCH_KEYS)
+        if cls.MANUFACTURER_ID or cls.DEVICE_TYPE:
+            return ((cls.MANUFACTURER_ID or None, cls.DEVICE_TYPE or None, None, None),)
+        return ()
     
     def matches(self, manufacturer_id, device_type):
         """
@@ -52,87 +455,99 @@ class WMBusDriverBase(ABC):
         # Hiçbiri tanımlanmamışsa
         return False
     
-    def parse_telegram(self, telegram_data):
-        self.telegram_data = telegram_data
-        self.telegram_info = telegram_data.get("telegram_info", {})
-        self.data_blocks = telegram_data.get("data_blocks", [])
+    def create_context(self, telegram_data, payload=None):
+        """
+        Telgraf için çözümleme bağlamını oluşturur.
+        
+        Args:
+            telegram_data: Çözümleyici sonucu (telegram_info başlık alanlarını
+                           tamsayı olarak içerir: version, device_type_code ...)
+            payload: Çözülmüş payload (bytes); verilmezse telegram_data'dan alınır
+            
+        Returns:
+            DriverContext
+        """
+        ctx = DriverContext(telegram_data, payload)
 
         # 👉 Burada version int olarak ayarlanmalı
-        version_raw = self.telegram_info.get("version")
+        version_raw = ctx.telegram_info.get("version")
         if isinstance(version_raw, str) and version_raw.startswith("0x"):
-            self.telegram_info["version"] = int(version_raw, 16)
+            ctx.telegram_info["version"] = int(version_raw, 16)
         elif isinstance(version_raw, str) and version_raw.isdigit():
-            self.telegram_info["version"] = int(version_raw)
+            ctx.telegram_info["version"] = int(version_raw)
         elif isinstance(version_raw, int):
             pass  # zaten int
         else:
-            self.telegram_info["version"] = 0  # fallback
-
-        self.generate_basic_info()
-        self.parse()
-        return self.result
+            ctx.telegram_info["version"] = 0  # fallback
+        return ctx
+    
+    def parse_telegram(self, telegram_data, payload=None):
+        """
+        Sürücü çağrı sözleşmesi: çözümlenmiş telgrafı sürücüye uygular.
+        
+        Args:
+            telegram_data: Çözümleyici sonucu
+            payload: Çözülmüş payload (bytes, opsiyonel)
+            
+        Returns:
+            dict: Sürücünün sonuç sözlüğü
+        """
+        ctx = self.create_context(telegram_data, payload)
+        self.generate_basic_info(ctx)
+        self.parse(ctx)
+        return ctx.result
 
     
-    def generate_basic_info(self):
+    def generate_basic_info(self, ctx):
         """Temel telgraf bilgilerini oluşturur."""
-        self.result.update({
+        ctx.result.update({
             "_": "telegram",
-            "id": self.telegram_info.get("address", ""),
-            "manufacturer": self.telegram_info.get("manufacturer", ""),
+            "id": ctx.telegram_info.get("address", ""),
+            "manufacturer": ctx.telegram_info.get("manufacturer", ""),
             "status": "OK",
             "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
         })
     
     @abstractmethod
-    def parse(self):
+    def parse(self, ctx):
         """
         Telgraf içindeki verileri çözümler.
         Her sürücü kendi veri yorumlama mantığını uygulamalıdır.
         Alt sınıflar tarafından uygulanmalıdır.
-        """
-        pass
-    
-    def find_block(self, dif, vif, dife=None):
-        """
-        Belirli bir DIF/VIF kombinasyonuna sahip veri bloğunu bulur.
         
         Args:
-            dif: DIF değeri (örn: "0x0b")
-            vif: VIF değeri (örn: "0x6e")
-            dife: DIFE değeri (opsiyonel)
-            
-        Returns:
-            dict or None: Bulunan veri bloğu veya hiçbiri bulunamazsa None
+            ctx: DriverContext; sonuçlar ctx.result'a yazılır
         """
-        for block in self.data_blocks:
-            if block["dif"]["byte"] == dif and block["vif"]["byte"] == vif:
-                # DIFE kontrolü (eğer belirtilmişse)
-                if dife:
-                    if "dife" in block and any(d["byte"] == dife for d in block["dife"]):
-                        return block
-                else:
-                    # DIFE kontrolü istenmiyorsa veya blokta DIFE yoksa
-                    if "dife" not in block or not block["dife"]:
-                        return block
-        return None
+        pass
     
-    def get_block_value(self, dif, vif, dife=None, default=None):
+    @classmethod
+    def field_extractor(cls, layout=None):
+        """Sınıfın (ve düzenin) derlenmiş alan çıkarıcısını döndürür (ilk çağrıda derlenir)."""
+        extractor = _FIELD_EXTRACTORS.get((cls, layout))
+        if extractor is None:
+            fields = cls.FIELDS[layout] if layout is not None else cls.FIELDS
+            extractor = _FIELD_EXTRACTORS.setdefault((cls, layout), compile_fields(fields))
+        return extractor
+    
+    @classmethod
+    def field_units(cls, layout=None):
+        """Alan adı -> birim sözlüğü"""
+        fields = cls.FIELDS[layout] if layout is not None else cls.FIELDS
+        return {field.name: field.unit for field in fields if field.unit}
+    
+    def extract_fields(self, ctx, payload=None, layout=None):
         """
-        Belirli bir DIF/VIF kombinasyonuna sahip bloğun değerini döndürür.
+        FIELDS tanımlarına göre alanları çıkarır.
         
         Args:
-            dif: DIF değeri (örn: "0x0b")
-            vif: VIF değeri (örn: "0x6e")
-            dife: DIFE değeri (opsiyonel)
-            default: Blok bulunamazsa dönecek varsayılan değer
+            ctx: DriverContext (BlockField alanları için)
+            payload: Ham payload (bytes); yalnızca PayloadField alanları için gerekir
+            layout: FIELDS sözlükse kullanılacak telgraf düzeni
             
         Returns:
-            Bloğun değeri veya blok bulunamazsa default değeri
+            dict: Alan adı -> değer (bulunamayan alanlar None)
         """
-        block = self.find_block(dif, vif, dife)
-        if block:
-            return block["value"]
-        return default
+        return self.field_extractor(layout)(payload, ctx)
     
     def format_date(self, date_str, default=""):
         """
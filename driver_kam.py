@@ -3,7 +3,7 @@
 Kamstrup Multical ısı sayacı için sürücü.
 """
 
-from driver_base import WMBusDriverBase
+from driver_base import WMBusDriverBase, BlockField
 
 class KamstrupMulticalDriver(WMBusDriverBase):
     """
@@ -17,86 +17,40 @@ class KamstrupMulticalDriver(WMBusDriverBase):
     MANUFACTURER_ID = "0x0477"  # Kamstrup
     DEVICE_TYPE = 0x03  # Heat Meter
     
-    def parse(self):
+    # DIF'ler öncelik sırasıyla (en yüksek depolama/veri uzunluğu kodu önce)
+    FIELDS = (
+        BlockField("total_energy_kwh", ("0x04", "0x03", "0x02", "0x01"), ("0x06", "0x05", "0x04"), scale=-3, unit="kWh"),
+        BlockField("total_volume_m3", ("0x04", "0x03", "0x02", "0x01"), ("0x13", "0x14", "0x15", "0x16"), unit="m³"),
+        BlockField("flow_temperature_c", ("0x02", "0x01"), ("0x5a", "0x5b"), unit="°C"),
+        BlockField("return_temperature_c", ("0x02", "0x01"), ("0x5e", "0x5f"), unit="°C"),
+        BlockField("flow_m3h", ("0x04", "0x03", "0x02", "0x01"), ("0x3b", "0x3c", "0x3d", "0x3e"), unit="m³/h"),
+        BlockField("operating_hours", "0x04", "0x74", encoding="raw", unit="h"),
+        BlockField("power_w", ("0x04", "0x03", "0x02", "0x01"), ("0x2b", "0x2c", "0x2d", "0x2e"), unit="W"),
+        BlockField("device_date_time", "0x04", "0x6d", encoding="formatted"),
+        BlockField("annual_energy_kwh", "0x42", "0x06", scale=-3, unit="kWh"),
+    )
+    
+    def parse(self, ctx):
         """Multical telgrafını çözümle."""
         # Cihaz tipini belirle
-        self.result["media"] = "heat"
-        self.result["meter"] = "multical"
-        self.result["name"] = ""  # İstenirse özelleştirilebilir
-        
-        # Enerji değerlerini çözümle (Wh birimleri)
-        for dif in ["0x01", "0x02", "0x03", "0x04"]:
-            for vif in ["0x06", "0x05", "0x04"]:
-                energy_block = self.find_block(dif, vif)
-                if energy_block:
-                    # kWh'a dönüştür
-                    energy_value = energy_block["value"] * energy_block["vif"]["info"]["multiplier"] / 1000
-                    self.result["total_energy_kwh"] = energy_value
-                    break
-        
-        # Hacim değerlerini çözümle (m³)
-        for dif in ["0x01", "0x02", "0x03", "0x04"]:
-            for vif in ["0x13", "0x14", "0x15", "0x16"]:
-                volume_block = self.find_block(dif, vif)
-                if volume_block:
-                    volume_value = volume_block["value"] * volume_block["vif"]["info"]["multiplier"]
-                    self.result["total_volume_m3"] = volume_value
-                    break
-        
-        # Akış sıcaklığını çözümle (°C)
-        for dif in ["0x01", "0x02"]:
-            for vif in ["0x5a", "0x5b"]:
-                flow_temp_block = self.find_block(dif, vif)
-                if flow_temp_block:
-                    flow_temp = flow_temp_block["value"] * flow_temp_block["vif"]["info"]["multiplier"]
-                    self.result["flow_temperature_c"] = flow_temp
-                    break
-        
-        # Dönüş sıcaklığını çözümle (°C)
-        for dif in ["0x01", "0x02"]:
-            for vif in ["0x5e", "0x5f"]:
-                return_temp_block = self.find_block(dif, vif)
-                if return_temp_block:
-                    return_temp = return_temp_block["value"] * return_temp_block["vif"]["info"]["multiplier"]
-                    self.result["return_temperature_c"] = return_temp
-                    break
+        ctx.result["media"] = "heat"
+        ctx.result["meter"] = "multical"
+        ctx.result["name"] = ""  # İstenirse özelleştirilebilir
         
-        # Anlık akışı çözümle (m³/h)
-        for dif in ["0x01", "0x02", "0x03", "0x04"]:
-            for vif in ["0x3b", "0x3c", "0x3d", "0x3e"]:
-                flow_block = self.find_block(dif, vif)
-                if flow_block:
-                    flow_value = flow_block["value"] * flow_block["vif"]["info"]["multiplier"]
-                    self.result["flow_m3h"] = flow_value
-                    break
-        
-        # Toplam çalışma saati
-        hour_block = self.find_block("0x04", "0x74")
-        if hour_block:
-            self.result["operating_hours"] = hour_block["value"]
-        
-        # Güç değeri (W)
-        for dif in ["0x01", "0x02", "0x03", "0x04"]:
-            for vif in ["0x2b", "0x2c", "0x2d", "0x2e"]:
-                power_block = self.find_block(dif, vif)
-                if power_block:
-                    power_value = power_block["value"] * power_block["vif"]["info"]["multiplier"]
-                    self.result["power_w"] = power_value
-                    break
-        
-        # Tarih ve zaman bilgisi
-        datetime_block = self.find_block("0x04", "0x6d")
-        if datetime_block:
-            date_str = datetime_block["formatted_value"]
-            self.result["device_date_time"] = date_str.replace("/", "-")
+        # Enerji, hacim, sıcaklık, akış, güç, tarih ve yıllık tüketim alanları
+        for name, value in self.extract_fields(ctx).items():
+            if value is not None:
+                ctx.result[name] = value
+        if "device_date_time" in ctx.result:
+            ctx.result["device_date_time"] = ctx.result["device_date_time"].replace("/", "-")
         
         # Cihaz durumu
-        if "tpl" in self.telegram_info and "status" in self.telegram_info["tpl"]:
-            status_byte = self.telegram_info["tpl"]["status"]
+        if "tpl" in ctx.telegram_info and "status" in ctx.telegram_info["tpl"]:
+            status_byte = ctx.telegram_info["tpl"]["status"]
             status_int = int(status_byte, 16)
             
             if status_int == 0:
-                self.result["status"] = "OK"
+                ctx.result["status"] = "OK"
             else:
                 error_codes = []
                 
@@ -119,12 +73,6 @@ class KamstrupMulticalDriver(WMBusDriverBase):
                     error_codes.append("FROST_DETECTED")
                 
                 if error_codes:
-                    self.result["status"] = ", ".join(error_codes)
+                    ctx.result["status"] = ", ".join(error_codes)
                 else:
-                    self.result["status"] = f"UNKNOWN_ERROR ({status_byte})"
-        
-        # Yıllık tüketim
-        annual_block = self.find_block("0x42", "0x06")
-        if annual_block:
-            annual_energy = annual_block["value"] * annual_block["vif"]["info"]["multiplier"] / 1000
-            self.result["annual_energy_kwh"] = annual_energy
\ No newline at end of file
+                    ctx.result["status"] = f"UNKNOWN_ERROR ({status_byte})"
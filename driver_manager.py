@@ -1,154 +1,452 @@
 # -*- coding: utf-8 -*-
 """
 wM-Bus cihaz sürücülerini yöneten modül.
+
+Sürücüler önce üretilmiş statik kayıttan (driver_registry.py) okunur; kayıt
+yoksa sürücü dizini taranır. Kayıttaki sürücü modülleri bir telgraf o sürücüye
+gerçekten ihtiyaç duyana kadar içe aktarılmaz.
+
+Kaydı yeniden üretmek için: python driver_manager.py --generate-registry
 """
 
 import os
-import sys
+import argparse
+import threading
 import importlib
 import inspect
 import logging
+from collections import OrderedDict
 from driver_base import WMBusDriverBase
 
 # Loglama
 logger = logging.getLogger("wmbus_driver_manager")
 
+# Sürücü dosyalarının bulunduğu dizin (çalışma dizininden bağımsız)
+DRIVER_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_MODULE = "driver_registry"
+NON_DRIVER_FILES = ("driver_base.py", "driver_manager.py", REGISTRY_MODULE + ".py")
+
+# Eşleşme öncelikleri (küçük olan önce seçilir); eski find_driver geçişlerinin sırası
+PRIORITY_DETECT = 0         # DETECT_KEYS
+PRIORITY_CI = 1             # CI alanı belirtilmiş anahtarlar
+PRIORITY_EXACT = 2          # Üretici + cihaz tipi
+PRIORITY_MANUFACTURER = 3   # Yalnızca üretici
+PRIORITY_DEVICE_TYPE = 4    # Yalnızca cihaz tipi
+PRIORITY_OTHER = 5
+
+# Sayaç başına sürücü çözümleme önbelleğinin varsayılan boyutu
+DRIVER_CACHE_SIZE = 10000
+
+# Önbellekte "sürücü yok" sonucunu None'dan ayırmak için
+_MISSING = object()
+
+
+def _to_int(value):
+    if isinstance(value, str):
+        try:
+            return int(value, 0)
+        except ValueError:
+            return value
+    return value
+
+
+def _to_hex(value, width):
+    if isinstance(value, int):
+        return f"0x{value:0{width}x}"
+    if isinstance(value, str):
+        return value.lower()
+    return value
+
+
+def normalize_match_key(key):
+    """
+    Eşleşme anahtarını telgraf bilgisiyle aynı biçime getir:
+    (üretici "0x....", cihaz tipi int, versiyon int, CI "0x..")
+    """
+    manufacturer_id, device_type, version, ci_field = key
+    return (_to_hex(manufacturer_id, 4), _to_int(device_type), _to_int(version), _to_hex(ci_field, 2))
+
+
+def telegram_match_key(telegram_info):
+    """Telgraf bilgisinden eşleşme anahtarı oluştur"""
+    return normalize_match_key((
+        telegram_info.get("manufacturer_code"),
+        telegram_info.get("device_type_code"),
+        telegram_info.get("version"),
+        telegram_info.get("ci_field")
+    ))
+
+
+def match_priority(key):
+    """Statik eşleşme anahtarının önceliği (DETECT_KEYS hariç)"""
+    manufacturer_id, device_type, version, ci_field = key
+    if ci_field is not None:
+        return PRIORITY_CI
+    if manufacturer_id is not None and device_type is not None:
+        return PRIORITY_EXACT
+    if manufacturer_id is not None:
+        return PRIORITY_MANUFACTURER
+    if device_type is not None:
+        return PRIORITY_DEVICE_TYPE
+    return PRIORITY_OTHER
+
+
+class DriverSpec:
+    """
+    Kayıttaki bir sürücünün eşleşme anahtarları, (ilk gerektiğinde içe
+    aktarılan) sınıfı ve tüm telgraflarda paylaşılan durumsuz örneği.
+    """
+    __slots__ = ("module", "class_name", "match_keys", "detect_keys", "has_detect", "_driver_class", "_driver", "_failed")
+
+    def __init__(self, module, class_name, match_keys=(), detect_keys=(), has_detect=False, driver_class=None):
+        self.module = module
+        self.class_name = class_name
+        self.match_keys = tuple(normalize_match_key(key) for key in match_keys)
+        self.detect_keys = tuple(normalize_match_key(key) for key in detect_keys)
+        self.has_detect = has_detect
+        self._driver_class = driver_class
+        self._driver = None
+        self._failed = False
+
+    @classmethod
+    def from_class(cls, driver_class):
+        return cls(
+            driver_class.__module__,
+            driver_class.__name__,
+            driver_class.match_keys(),
+            driver_class.DETECT_KEYS,
+            hasattr(driver_class, "detect"),
+            driver_class
+        )
+
+    @property
+    def loaded(self):
+        return self._driver_class is not None
+
+    @property
+    def failed(self):
+        return self._failed
+
+    def load(self):
+        """Sürücü sınıfını döndür (modül gerekirse şimdi içe aktarılır); hata olursa None"""
+        if self._driver_class is None and not self._failed:
+            try:
+                module = importlib.import_module(self.module)
+                self._driver_class = getattr(module, self.class_name)
+                logger.info(f"Sürücü yüklendi: {self.class_name} ({self.module})")
+            except Exception as e:
+                self._failed = True
+                logger.error(f"Sürücü yüklenirken hata: {self.module}.{self.class_name} - {e}")
+        return self._driver_class
+
+    def driver(self):
+        """Paylaşılan sürücü örneğini döndür (ilk çağrıda oluşturulur); yüklenemezse None"""
+        if self._driver is None:
+            driver_class = self.load()
+            if driver_class is not None:
+                self._driver = driver_class(None)
+        return self._driver
+
+    def index_entries(self):
+        """(öncelik, anahtar) çiftleri"""
+        for key in self.detect_keys:
+            yield PRIORITY_DETECT, key
+        for key in self.match_keys:
+            yield match_priority(key), key
+
+    def __repr__(self):
+        return f"DriverSpec({self.module}.{self.class_name})"
+
+
+def scan_drivers(directory=DRIVER_DIR):
+    """
+    Dizindeki driver_*.py dosyalarını içe aktarıp sürücü sınıflarını bul
+
+    Returns:
+        list: WMBusDriverBase alt sınıfları (dosya adı sırasıyla)
+    """
+    try:
+        driver_files = sorted(f for f in os.listdir(directory)
+                              if f.startswith('driver_') and f.endswith('.py') and f not in NON_DRIVER_FILES)
+        logger.info(f"Bulunan sürücü dosyaları: {driver_files}")
+    except Exception as e:
+        logger.error(f"Sürücü dosyaları listelenirken hata: {e}")
+        driver_files = []
+    
+    drivers = []
+    for file in driver_files:
+        try:
+            # .py uzantısını kaldır
+            module_name = file[:-3]
+            
+            # Modülü dinamik olarak içe aktar
+            module = importlib.import_module(module_name)
+            
+            # Modülde tanımlı tüm sınıfları bul
+            for name, obj in inspect.getmembers(module, inspect.isclass):
+                # WMBusDriverBase'den türetilmiş, aynı sınıf değil ve başka modülden içe aktarılmamışsa
+                if issubclass(obj, WMBusDriverBase) and obj != WMBusDriverBase and obj.__module__ == module_name:
+                    logger.info(f"Sürücü yüklendi: {name} ({module_name})")
+                    # Sürücüyü listeye ekle (sınıf olarak, instance değil)
+                    drivers.append(obj)
+        except Exception as e:
+            logger.error(f"Sürücü yüklenirken hata: {file} - {e}")
+    return drivers
+
+
+def _format_keys(keys):
+    """Anahtar listesini kayıt dosyası için (sayılar hex olarak) yaz"""
+    def field(value):
+        return f"0x{value:02x}" if isinstance(value, int) else repr(value)
+    items = ", ".join("(" + ", ".join(field(value) for value in key) + ")" for key in keys)
+    return f"({items},)" if len(keys) == 1 else f"({items})"
+
+
+def generate_registry(path=None, directory=DRIVER_DIR):
+    """
+    Sürücü dizinini tarayıp statik sürücü kaydını (driver_registry.py) üret
+
+    PyInstaller derlemelerinden önce çalıştırılmalıdır (spec dosyaları bunu
+    kendisi yapar). Spec dosyaları hiddenimports için dönen listeyi kullanmalıdır;
+    driver_registry modülü daha önce içe aktarılmışsa (DriverManager tekil
+    örneği) içindeki DRIVER_MODULES eski listedir.
+
+    Returns:
+        list: Kayda yazılan sürücü modülleri (sıralı)
+    """
+    if path is None:
+        path = os.path.join(directory, REGISTRY_MODULE + ".py")
+    
+    lines = [
+        "# -*- coding: utf-8 -*-",
+        '"""',
+        "wM-Bus sürücü kaydı - driver_manager.generate_registry tarafından üretildi, elle düzenlemeyin.",
+        "Yeniden üretmek için: python driver_manager.py --generate-registry",
+        '"""',
+        "",
+        "# (modül, sınıf, eşleşme anahtarları, algılama anahtarları, detect kancası)",
+        "# Anahtarlar: (üretici kodu, cihaz tipi, versiyon, CI alanı), None her değerle eşleşir",
+        "DRIVERS = [",
+    ]
+    modules = set()
+    for driver_class in scan_drivers(directory):
+        spec = DriverSpec.from_class(driver_class)
+        modules.add(spec.module)
+        lines.append(f"    ({spec.module!r}, {spec.class_name!r},")
+        lines.append(f"     {_format_keys(spec.match_keys)},")
+        lines.append(f"     {_format_keys(spec.detect_keys)},")
+        lines.append(f"     {spec.has_detect}),")
+    lines += [
+        "]",
+        "",
+        "# PyInstaller hiddenimports için sürücü modülleri",
+        "DRIVER_MODULES = sorted({entry[0] for entry in DRIVERS})",
+        "",
+    ]
+    
+    # Depodaki tüm kaynak dosyalar gibi CRLF satır sonlarıyla yazılır
+    with open(path, mode="w", encoding="utf-8", newline="\r\n") as f:
+        f.write("\n".join(lines))
+    logger.info(f"Sürücü kaydı yazıldı: {path}")
+    return sorted(modules)
+
+
 class DriverManager:
     """
     wM-Bus cihaz sürücülerini yönetme sınıfı.
     Tüm kayıtlı sürücüleri takip eder ve telgraflara uygun sürücüyü bulur.
+    
+    Sürücüler durumsuzdur; her sürücünün tek bir örneği tüm telgraflarda ve
+    thread'lerde paylaşılır (telgraf durumu driver_base.DriverContext'te).
+    
+    Bulunan sürücü örneği (adres, üretici, versiyon, cihaz tipi, CI) anahtarıyla
+    sınırlı bir LRU önbellekte tutulur; sabit bir kurulumda her sayaç için
+    arama süreç ömrü boyunca bir kez yapılır. Sürücü tablosu yeniden
+    kurulduğunda önbellek temizlenir.
+    
+    cache_size: Önbellekte tutulacak en fazla sayaç sayısı
     """
-    def __init__(self):
-        self.drivers = []
+    def __init__(self, cache_size=DRIVER_CACHE_SIZE):
+        self.specs = []
+        self._index = {}
+        self._masks = ()
+        self._detect_hooks = []
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.load_drivers()
     
+    @property
+    def drivers(self):
+        """Tüm sürücü sınıfları (henüz yüklenmemiş modüller şimdi içe aktarılır)"""
+        return [driver_class for driver_class in (spec.load() for spec in self.specs) if driver_class is not None]
+    
     def load_drivers(self):
-        """Tüm kullanılabilir sürücüleri yükler."""
-        # Mevcut dizindeki tüm driver_* dosyalarını bul
+        """Tüm kullanılabilir sürücüleri kaydeder (önce statik kayıt, yoksa dizin taraması)."""
         try:
-            driver_files = [f for f in os.listdir('.') if f.startswith('driver_') and f.endswith('.py') and f != 'driver_base.py' and f != 'driver_manager.py']
-            logger.info(f"Bulunan sürücü dosyaları: {driver_files}")
+            registry = importlib.import_module(REGISTRY_MODULE)
+            self.specs = [DriverSpec(*entry) for entry in registry.DRIVERS]
+            logger.info(f"Sürücü kaydından {len(self.specs)} sürücü okundu")
+        except ImportError:
+            logger.info("Sürücü kaydı bulunamadı, sürücü dizini taranıyor")
+            self.specs = []
         except Exception as e:
-            logger.error(f"Sürücü dosyaları listelenirken hata: {e}")
-            driver_files = []
+            logger.error(f"Sürücü kaydı okunurken hata: {e}")
+            self.specs = []
         
-        for file in driver_files:
-            try:
-                # .py uzantısını kaldır
-                module_name = file[:-3]
-                
-                # Modülü dinamik olarak içe aktar
-                module = importlib.import_module(module_name)
-                
-                # Modüldeki tüm sınıfları bul
-                for name, obj in inspect.getmembers(module, inspect.isclass):
-                    # WMBusDriverBase'den türetilmiş ve aynı sınıf değilse
-                    if issubclass(obj, WMBusDriverBase) and obj != WMBusDriverBase:
-                        logger.info(f"Sürücü yüklendi: {name} ({module_name})")
-                        # Sürücüyü listeye ekle (sınıf olarak, instance değil)
-                        self.drivers.append(obj)
-            except Exception as e:
-                logger.error(f"Sürücü yüklenirken hata: {file} - {e}")
+        if not self.specs:
+            self.specs = [DriverSpec.from_class(driver_class) for driver_class in scan_drivers()]
+            logger.info(f"Toplam {len(self.specs)} sürücü yüklendi")
+        self.build_index()
+    
+    def build_index(self):
+        """
+        Statik eşleşme anahtarlarından sürücü tablosunu kur.
+        
+        Tablo anahtarı (üretici, cihaz tipi, versiyon, CI) dörtlüsüdür (None =
+        her değer); değeri (öncelik, kayıt sırası, DriverSpec). Aynı anahtarı
+        birden fazla sürücü tanımlarsa önceliği yüksek, eşitse kayıtta önce
+        gelen sürücü kalır.
+        """
+        index = {}
+        masks = set()
+        for order, spec in enumerate(self.specs):
+            if spec.failed:
+                continue
+            for priority, key in spec.index_entries():
+                entry = (priority, order, spec)
+                current = index.get(key)
+                if current is None or entry[:2] < current[:2]:
+                    index[key] = entry
+                masks.add(tuple(value is not None for value in key))
+        self._index = index
+        # Yalnızca tanımlı anahtarlarda kullanılan alan birleşimleri sorgulanır
+        self._masks = tuple(sorted(masks, reverse=True))
+        # Statik anahtarı olmayan detect kancaları yalnızca tablo eşleşmezse denenir
+        self._detect_hooks = [spec for spec in self.specs if spec.has_detect and not spec.detect_keys]
+        self.clear_cache()
+        logger.info(f"Sürücü tablosu: {len(index)} anahtar, {len(self._masks)} alan birleşimi")
+    
+    def lookup(self, telegram_info):
+        """
+        Telgrafa uyan sürücü kaydını tablodan bul (detect kancaları çalıştırılmaz)
         
-        logger.info(f"Toplam {len(self.drivers)} sürücü yüklendi")
+        Returns:
+            DriverSpec veya None
+        """
+        key = telegram_match_key(telegram_info)
+        best = None
+        for mask in self._masks:
+            entry = self._index.get(tuple(value if used else None for value, used in zip(key, mask)))
+            if entry is not None and (best is None or entry[:2] < best[:2]):
+                best = entry
+        return best[2] if best is not None else None
+    
+    def clear_cache(self):
+        """Sayaç başına sürücü önbelleğini temizle"""
+        with self._cache_lock:
+            self._cache.clear()
     
     def find_driver(self, telegram_info):
         """
-        Telgraf bilgilerine göre uygun sürücüyü bulur.
+        Telgraf bilgilerine göre uygun sürücüyü bulur (sayaç önbelleği ile).
         
         Args:
             telegram_info: Çözümlenmiş telgraf bilgisi
             
         Returns:
-            WMBusDriverBase instance veya None
+            WMBusDriverBase instance (paylaşılan) veya None
         """
-        manufacturer_id = telegram_info.get("manufacturer_code")
-        device_type = telegram_info.get("device_type_code")
-        ci_field = telegram_info.get("ci_field")
+        cache_key = (
+            telegram_info.get("address"),
+            telegram_info.get("manufacturer_code"),
+            telegram_info.get("version"),
+            telegram_info.get("device_type_code"),
+            telegram_info.get("ci_field")
+        )
+        with self._cache_lock:
+            driver = self._cache.get(cache_key, _MISSING)
+            if driver is not _MISSING:
+                self._cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return driver
+            self.cache_misses += 1
         
-        logger.info(f"Sürücü aranıyor: Üretici={manufacturer_id}, Cihaz Tipi={device_type}, CI={ci_field}")
+        driver = self.resolve_driver(telegram_info)
+        with self._cache_lock:
+            self._cache[cache_key] = driver
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return driver
+    
+    def resolve_driver(self, telegram_info):
+        """
+        Telgraf bilgilerine göre uygun sürücüyü arar (önbellek kullanılmaz).
         
-        # Yeni detect mekanizması
-        for driver_class in self.drivers:
-            try:
-                # Eğer sınıfta detect metodu varsa kullan
-                if hasattr(driver_class, 'detect'):
-                    driver = driver_class(None)
-                    driver.telegram_info = telegram_info
-                    
-                    # Cihaz algılama metodunu çağır
-                    if driver.detect(telegram_info):
-                        logger.info(f"Detect metoduyla sürücü bulundu: {driver_class.__name__}")
-                        return driver
-            except Exception as e:
-                logger.error(f"Detect kontrolünde hata: {driver_class.__name__} - {e}")
+        Önce statik eşleşme tablosuna bakılır; eşleşme yoksa statik anahtarı
+        olmayan sürücülerin detect kancaları denenir.
         
-        # CI alanı özel sürücüleri kontrol et (eğer CI alanı varsa)
-        if ci_field and ci_field in ("0xa1", "0xa2", "0xa3"):
-            matching_drivers = []
-            for driver_class in self.drivers:
-                try:
-                    # Driver sınıfının örneğini oluştur
-                    driver = driver_class(None)
-                    
-                    # Telegram bilgisini sürücüye ekle
-                    driver.telegram_info = telegram_info
-                    
-                    # CI alanına göre eşleşme kontrolü yap
-                    if hasattr(driver, 'matches_ci') and driver.matches_ci(ci_field):
-                        matching_drivers.append(driver)
-                        logger.info(f"CI eşleşmeli sürücü bulundu: {driver_class.__name__}")
-                except Exception as e:
-                    logger.error(f"CI eşleşme kontrolünde hata: {driver_class.__name__} - {e}")
+        Args:
+            telegram_info: Çözümlenmiş telgraf bilgisi
             
-            # Birden fazla eşleşen sürücü varsa, ilkini seç
-            if matching_drivers:
-                if len(matching_drivers) > 1:
-                    logger.warning(f"Birden fazla sürücü bulundu: {[d.__class__.__name__ for d in matching_drivers]}")
-                return matching_drivers[0]
+        Returns:
+            WMBusDriverBase instance (paylaşılan) veya None
+        """
+        manufacturer_id = telegram_info.get("manufacturer_code")
+        device_type = telegram_info.get("device_type_code")
+        ci_field = telegram_info.get("ci_field")
         
-        # Tam eşleşme bulmaya çalış
-        for driver_class in self.drivers:
-            try:
-                # Driver sınıfının örneğini oluştur
-                driver = driver_class(None)
-                
-                # Eşleşme kontrolü
-                if driver.matches(manufacturer_id, device_type):
-                    logger.info(f"Sürücü bulundu: {driver_class.__name__}")
-                    return driver
-            except Exception as e:
-                logger.error(f"Sürücü eşleşme kontrolünde hata: {driver_class.__name__} - {e}")
+        logger.info(f"Sürücü aranıyor: Üretici={manufacturer_id}, Cihaz Tipi={device_type}, CI={ci_field}")
         
-        # Sadece üretici ID'sine göre bulamazsak
-        for driver_class in self.drivers:
-            try:
-                driver = driver_class(None)
-                if driver.matches(manufacturer_id, None):
-                    logger.info(f"Üretici eşleşmeli sürücü bulundu: {driver_class.__name__}")
-                    return driver
-            except Exception as e:
-                logger.error(f"Üretici eşleşme kontrolünde hata: {driver_class.__name__} - {e}")
+        spec = self.lookup(telegram_info)
+        if spec is not None:
+            driver = spec.driver()
+            if driver is None:
+                # Modül yüklenemedi: tabloyu onsuz kurup yeniden ara
+                self.build_index()
+                return self.resolve_driver(telegram_info)
+            logger.info(f"Sürücü bulundu: {spec.class_name}")
+            return driver
         
-        # Sadece cihaz tipine göre bulamazsak
-        for driver_class in self.drivers:
+        for spec in self._detect_hooks:
+            driver = spec.driver()
+            if driver is None:
+                continue
             try:
-                driver = driver_class(None)
-                if driver.matches(None, device_type):
-                    logger.info(f"Cihaz tipi eşleşmeli sürücü bulundu: {driver_class.__name__}")
+                # Cihaz algılama metodunu çağır
+                if driver.detect(telegram_info):
+                    logger.info(f"Detect metoduyla sürücü bulundu: {spec.class_name}")
                     return driver
             except Exception as e:
-                logger.error(f"Cihaz tipi eşleşme kontrolünde hata: {driver_class.__name__} - {e}")
+                logger.error(f"Detect kontrolünde hata: {spec.class_name} - {e}")
         
         logger.warning(f"Uygun sürücü bulunamadı: {manufacturer_id}, {device_type}")
         return None
     
-    def apply_driver(self, telegram_data):
+    def stats(self):
+        with self._cache_lock:
+            cache_entries = len(self._cache)
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "drivers": len(self.specs),
+            "loaded_drivers": sum(1 for spec in self.specs if spec.loaded),
+            "index_keys": len(self._index),
+            "cache_entries": cache_entries,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0
+        }
+    
+    def apply_driver(self, telegram_data, payload=None):
         """
         Çözümlenmiş telgraf verilerine uygun sürücüyü uygular.
         
         Args:
             telegram_data: wmbus_parser'dan gelen çözümlenmiş veri
+            payload: Çözülmüş payload (bytes, opsiyonel); verilmezse
+                     telegram_data.payload kullanılır
             
         Returns:
             Güncellenmiş telegram_data (driver çıktıları dahil)
@@ -170,7 +468,7 @@ class DriverManager:
         if driver:
             logger.info(f"Sürücü bulundu ve uygulanıyor: {driver.__class__.__name__}")
             try:
-                result = driver.parse_telegram(telegram_data)
+                result = driver.parse_telegram(telegram_data, payload)
 
                 if result:
                     logger.info("Sürücü çözümlemesi başarılı")
@@ -204,16 +502,29 @@ def get_driver_manager():
     global _driver_manager
     return _driver_manager
 
-def apply_driver(telegram_data):
+def apply_driver(telegram_data, payload=None):
     """
     Çözümlenmiş telgraf verilerine uygun sürücüyü uygular.
     
     Args:
         telegram_data: wmbus_parser'dan gelen çözümlenmiş veri
+        payload: Çözülmüş payload (bytes, opsiyonel)
         
     Returns:
         Sürücü tarafından oluşturulmuş cihaza özel veriler veya
         sürücü yoksa orijinal veriler
     """
     manager = get_driver_manager()
-    return manager.apply_driver(telegram_data)
\ No newline at end of file
+    return manager.apply_driver(telegram_data, payload)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="wM-Bus sürücü yöneticisi")
+    parser.add_argument("--generate-registry", action="store_true", help="Statik sürücü kaydını (driver_registry.py) üret")
+    args = parser.parse_args()
+    
+    if args.generate_registry:
+        modules = generate_registry()
+        print(f"Sürücü kaydı yazıldı: {len(modules)} sürücü modülü ({', '.join(modules)})")
+    else:
+        parser.print_help()
@@ -17,79 +17,79 @@ class QundisQcaloricDriver(WMBusDriverBase):
     MANUFACTURER_ID = "0x4493"  # Qundis
     DEVICE_TYPE = 0x08  # Heat Cost Allocator
     
-    def parse(self):
+    def parse(self, ctx):
         """Qcaloric telgrafını çözümle."""
         # Cihaz tipini belirle
-        self.result["media"] = "heat cost allocation"
-        self.result["meter"] = "qcaloric"
-        self.result["name"] = ""  # İstenirse özelleştirilebilir
+        ctx.result["media"] = "heat cost allocation"
+        ctx.result["meter"] = "qcaloric"
+        ctx.result["name"] = ""  # İstenirse özelleştirilebilir
         
         # VIF 0x6E - HCA (Heat Cost Allocator) değeri
         # Anlık tüketim
-        current_consumption = self.get_block_value("0x0b", "0x6e", default=0)
-        self.result["current_consumption_hca"] = current_consumption
+        current_consumption = ctx.get_block_value("0x0b", "0x6e", default=0)
+        ctx.result["current_consumption_hca"] = current_consumption
         
         # Referans tarihi tüketimi
-        consumption_at_set_date = self.get_block_value("0x4b", "0x6e", default=0)
-        self.result["consumption_at_set_date_hca"] = consumption_at_set_date
+        consumption_at_set_date = ctx.get_block_value("0x4b", "0x6e", default=0)
+        ctx.result["consumption_at_set_date_hca"] = consumption_at_set_date
         
         # Referans tarihi
-        set_date_block = self.find_block("0x42", "0x6c")
+        set_date_block = ctx.find_block("0x42", "0x6c")
         if set_date_block:
             date_str = set_date_block["formatted_value"]
             # Geçersiz tarih değerini düzelt
             if "15/2015" in date_str:
-                self.result["set_date"] = "2127-15-31"  # Veya başka bir düzeltilmiş değer
+                ctx.result["set_date"] = "2127-15-31"  # Veya başka bir düzeltilmiş değer
             else:
-                self.result["set_date"] = self.format_date(date_str, "2000-01-01")
+                ctx.result["set_date"] = self.format_date(date_str, "2000-01-01")
         else:
-            self.result["set_date"] = "2000-01-01"  # Varsayılan değer
+            ctx.result["set_date"] = "2000-01-01"  # Varsayılan değer
         
         # DIFE 0x08 ile ikinci referans tarihi
-        set_date_1_block = self.find_block("0xc2", "0x6c", "0x08")
+        set_date_1_block = ctx.find_block("0xc2", "0x6c", "0x08")
         if set_date_1_block:
             date_str = set_date_1_block["formatted_value"]
             # Geçersiz değeri düzelt
             if "14/2002" in date_str:
-                self.result["set_date_17"] = "2022-12-31"  # Cihaza özgü bilinen değer
+                ctx.result["set_date_17"] = "2022-12-31"  # Cihaza özgü bilinen değer
             else:
-                self.result["set_date_17"] = self.format_date(date_str, "2000-01-01")
+                ctx.result["set_date_17"] = self.format_date(date_str, "2000-01-01")
         
         # İkinci referans tarihi tüketimi
-        consumption_at_set_date_17 = self.get_block_value("0xcb", "0x6e", "0x08", default=0)
-        self.result["consumption_at_set_date_17_hca"] = consumption_at_set_date_17
+        consumption_at_set_date_17 = ctx.get_block_value("0xcb", "0x6e", "0x08", default=0)
+        ctx.result["consumption_at_set_date_17_hca"] = consumption_at_set_date_17
         
         # Hata tarihi
-        error_date_block = self.find_block("0x32", "0x6c")
+        error_date_block = ctx.find_block("0x32", "0x6c")
         if error_date_block:
             date_str = error_date_block["formatted_value"]
             # Geçersiz tarih değerini düzelt
             if "15/2015" in date_str:
-                self.result["error_date"] = "2127-15-31"
+                ctx.result["error_date"] = "2127-15-31"
             else:
-                self.result["error_date"] = self.format_date(date_str, "")
+                ctx.result["error_date"] = self.format_date(date_str, "")
         
         # Cihaz tarih ve saati
-        datetime_block = self.find_block("0x04", "0x6d")
+        datetime_block = ctx.find_block("0x04", "0x6d")
         if datetime_block:
             date_str = datetime_block["formatted_value"]
             if " " in date_str:
                 date_part, time_part = date_str.split(' ')
                 day, month, year = date_part.split('/')
-                self.result["device_date_time"] = f"{year}-{month}-{day} {time_part}"
+                ctx.result["device_date_time"] = f"{year}-{month}-{day} {time_part}"
             else:
-                self.result["device_date_time"] = date_str
+                ctx.result["device_date_time"] = date_str
         
         # Ek referans tarihi için varsayılan değer (eğer bulunamadıysa)
-        if "set_date_1" not in self.result:
-            self.result["set_date_1"] = "2127-15-31"
+        if "set_date_1" not in ctx.result:
+            ctx.result["set_date_1"] = "2127-15-31"
         
         # Durum bilgisi
-        if "tpl" in self.telegram_info and "status" in self.telegram_info["tpl"]:
-            status_byte = self.telegram_info["tpl"]["status"]
+        if "tpl" in ctx.telegram_info and "status" in ctx.telegram_info["tpl"]:
+            status_byte = ctx.telegram_info["tpl"]["status"]
             # 0x00 genellikle "OK" anlamına gelir
             if status_byte == "0x00":
-                self.result["status"] = "OK"
+                ctx.result["status"] = "OK"
             else:
                 # Hata kodlarını çözümle (cihaza özgü)
                 error_codes = []
@@ -105,6 +105,6 @@ class QundisQcaloricDriver(WMBusDriverBase):
                     error_codes.append("COMMUNICATION_ERROR")
                 
                 if error_codes:
-                    self.result["status"] = ", ".join(error_codes)
+                    ctx.result["status"] = ", ".join(error_codes)
                 else:
-                    self.result["status"] = f"UNKNOWN_ERROR ({status_byte})"
\ No newline at end of file
+                    ctx.result["status"] = f"UNKNOWN_ERROR ({status_byte})"
\ No newline at end of file
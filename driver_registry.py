@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+wM-Bus sürücü kaydı - driver_manager.generate_registry tarafından üretildi, elle düzenlemeyin.
+Yeniden üretmek için: python driver_manager.py --generate-registry
+"""
+
+# (modül, sınıf, eşleşme anahtarları, algılama anahtarları, detect kancası)
+# Anahtarlar: (üretici kodu, cihaz tipi, versiyon, CI alanı), None her değerle eşleşir
+DRIVERS = [
+    ('driver_ista1', 'IstaDriver',
+     (('0x495354', None, None, None),),
+     (),
+     False),
+    ('driver_istaheat', 'IstaHeatDriver',
+     (('0x2674', None, None, None),),
+     (('0x2674', 0x04, 0xa9, '0x8c'),),
+     False),
+    ('driver_itron', 'ItronDriver',
+     (('0x2697', None, None, None),),
+     (('0x2697', 0x00, None, None), ('0x2697', 0x03, None, None), ('0x2697', 0x07, None, None), ('0x2697', 0x16, None, None), ('0x2697', 0x33, None, None)),
+     False),
+    ('driver_kam', 'KamstrupMulticalDriver',
+     (('0x0477', 0x03, None, None),),
+     (),
+     False),
+    ('driver_qds', 'QundisQcaloricDriver',
+     (('0x4493', 0x08, None, None),),
+     (),
+     False),
+    ('driver_tch', 'TechemCompactDriver',
+     ((None, None, 0x39, '0xa2'),),
+     (),
+     False),
+    ('driver_vario411', 'TechemVario411Driver',
+     (('0x5068', 0x04, None, None),),
+     (),
+     False),
+    ('driver_vario451', 'TechemVario451Driver',
+     (('0x5068', None, None, None),),
+     (),
+     False),
+]
+
+# PyInstaller hiddenimports için sürücü modülleri
+DRIVER_MODULES = sorted({entry[0] for entry in DRIVERS})
@@ -6,8 +6,7 @@ Versiyon: 0x17
 """
 
 import logging
-from datetime import datetime
-from driver_base import WMBusDriverBase as BaseDriver
+from driver_base import WMBusDriverBase as BaseDriver, PayloadField
 
 logger = logging.getLogger("vario411_driver")
 
@@ -15,6 +14,12 @@ class TechemVario411Driver(BaseDriver):
     MANUFACTURER_ID = "0x5068"
     DEVICE_TYPE = 0x04
 
+    FIELDS = (
+        PayloadField("total_kwh", 86, 4, unit="Wh"),      # 32-bit LE
+        PayloadField("target_date", 34, 3, "date_ymd"),  # yıl, ay, gün
+        PayloadField("dll_version", 17, 1),
+    )
+
     def match_ci(self, telegram_data):
         try:
             ci_field = telegram_data.get("ci_field")
@@ -25,41 +30,25 @@ class TechemVario411Driver(BaseDriver):
             logger.warning(f"[MATCH-CI] Exception: {e}")
             return False
 
-    def parse(self):
+    def parse(self, ctx):
         try:
-            raw = self.telegram_data.get("raw_payload")
-            if not raw:
+            payload = ctx.payload
+            if not payload:
                 logger.error("Raw payload bulunamadı")
-                return self.result
-
-            payload = bytes.fromhex(raw)
+                return ctx.result
 
             if len(payload) < 40:
                 logger.warning("Payload çok kısa")
-                return self.result
-
-            # total_kwh (Wh olarak, 32-bit LE, offset 12)
-            target_raw = payload[86:90]
-            logger.info(f"target_raw: {target_raw.hex()}")  # target_raw log'a yazdırılıyor
-            target_wh = int.from_bytes(target_raw, byteorder="little")
-            total_kwh = target_wh 
-
-            # target_date (BCD encoded date, offset 34-36)
-            date_raw = payload[34:37]
-            year = 2000 + (date_raw[0] & 0x7F)
-            month = date_raw[1] & 0x0F
-            day = date_raw[2] & 0x1F
-
-            try:
-                target_date = datetime(year, month, day).strftime("%Y-%m-%d")
-            except Exception as e:
-                logger.warning(f"Tarih ayrıştırılamadı: {e}")
-                target_date = None
+                return ctx.result
 
-            # dll_version (1 byte, örneğin offset 17)
-            dll_version = payload[17]
+            values = self.extract_fields(ctx, payload)
+            if values["target_date"] is None:
+                logger.warning("Tarih ayrıştırılamadı")
+            total_kwh = values["total_kwh"]
+            target_date = values["target_date"]
+            dll_version = values["dll_version"]
 
-            self.result.update({
+            ctx.result.update({
                 "meter": "vario411",
                 "total_kwh": total_kwh,
                 "target_date": target_date,
@@ -73,4 +62,4 @@ class TechemVario411Driver(BaseDriver):
             import traceback
             logger.error(traceback.format_exc())
 
-        return self.result
+        return ctx.result
@@ -1,13 +1,17 @@
 import logging
 import traceback
-import binascii
-from driver_base import WMBusDriverBase
+from driver_base import WMBusDriverBase, PayloadField
 
 logger = logging.getLogger("vario451_driver")
 
 class TechemVario451Driver(WMBusDriverBase):
     MANUFACTURER_ID = "0x5068"
 
+    FIELDS = (
+        PayloadField("previous_gj", 3, 2, scale=-3, unit="GJ"),
+        PayloadField("current_gj", 7, 2, scale=-3, unit="GJ"),
+    )
+
     def match_ci(self, telegram_data):
         try:
             ci_field = telegram_data.get("ci_field")
@@ -36,53 +40,38 @@ class TechemVario451Driver(WMBusDriverBase):
 
 
 
-    def matches(self, manufacturer_id, device_type):
-        return manufacturer_id == self.MANUFACTURER_ID
-
-    def parse(self):
+    def parse(self, ctx):
         try:
-            self.result["media"] = "heat"
-            self.result["meter"] = "vario451"
-
-            raw_payload = None
-            if hasattr(self, "telegram_data") and isinstance(self.telegram_data, dict):
-                raw_payload = self.telegram_data.get("raw_payload")
-                if raw_payload and isinstance(raw_payload, str):
-                    payload = binascii.unhexlify(raw_payload)
-                else:
-                    logger.error("Payload boş veya yanlış formatta.")
-                    return self.result
-            else:
-                logger.error("telegram_data eksik.")
-                return self.result
+            ctx.result["media"] = "heat"
+            ctx.result["meter"] = "vario451"
+
+            payload = ctx.payload
+            if not payload:
+                logger.error("Payload boş veya yanlış formatta.")
+                return ctx.result
 
             if len(payload) < 9:
                 logger.warning("Payload çok kısa.")
-                return self.result
-
-            # previous: byte[3], byte[4]
-            prev_lo = payload[3]
-            prev_hi = payload[4]
-            previous_gj = (256.0 * prev_hi + prev_lo) / 1000
+                return ctx.result
 
-            # current: byte[7], byte[8]
-            curr_lo = payload[7]
-            curr_hi = payload[8]
-            current_gj = (256.0 * curr_hi + curr_lo) / 1000
+            # previous: byte[3], byte[4]; current: byte[7], byte[8]
+            values = self.extract_fields(ctx, payload)
+            previous_gj = values["previous_gj"]
+            current_gj = values["current_gj"]
 
             total_gj = current_gj + previous_gj
             total_kwh = total_gj * 277.7778
             current_kwh = current_gj * 277.7778
             previous_kwh = previous_gj * 277.7778
 
-            self.result["total_kwh"] = round(total_kwh, 3)
-            self.result["current_kwh"] = round(current_kwh, 3)
-            self.result["previous_kwh"] = round(previous_kwh, 3)
+            ctx.result["total_kwh"] = round(total_kwh, 3)
+            ctx.result["current_kwh"] = round(current_kwh, 3)
+            ctx.result["previous_kwh"] = round(previous_kwh, 3)
 
             logger.info(f"Vario451 çözümlendi: toplam={total_kwh}, mevcut={current_kwh}, önceki={previous_kwh}")
-            return self.result
+            return ctx.result
 
         except Exception as e:
             logger.error(f"Vario451 çözümleme hatası: {e}")
             logger.error(traceback.format_exc())
-            return self.result
+            return ctx.result
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+"""
+wM-Bus Sütunsal (NumPy) Toplu Çözümleme
+Aynı DIF/VIF düzenine sahip çok sayıda telgrafı (ör. fatura dönemi için
+binlerce Qundis HCA veya Kamstrup telgrafı) tek tek blok yürümeden çözer.
+Telgraflar düzenlerine göre gruplanır, payload'lar 2 boyutlu uint8 dizisine
+yığılır ve her alan sütun olarak vektörel çözümlenir.
+
+NumPy isteğe bağlıdır; kurulu değilse NUMPY_AVAILABLE False olur.
+"""
+
+import logging
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from wmbus_parser import (
+    DIF_TABLE,
+    VIF_TABLE,
+    FORMAT_CACHE,
+    FormatCache,
+    _normalize_keys,
+    _parse_frame,
+    _parse_data_blocks
+)
+from wmbus_utils import decode_date, decode_time
+
+logger = logging.getLogger("wmbus_columnar")
+
+
+class ColumnarGroup:
+    """Aynı kayıt düzenine sahip telgrafların sütunsal çözümleme sonucu"""
+    __slots__ = ("format", "rows", "addresses", "columns", "units")
+
+    def __init__(self, compiled, rows, addresses):
+        self.format = compiled
+        self.rows = rows            # Girdi listesindeki telgraf sıra numaraları
+        self.addresses = addresses  # Her satırın sayaç adresi
+        self.columns = {}           # Alan adı -> ndarray (çarpan uygulanmış değerler)
+        self.units = {}             # Alan adı -> birim
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return f"ColumnarGroup(rows={len(self.rows)}, fields={list(self.columns)})"
+
+
+def field_name(dif, dife, vif, vife):
+    """Alan adını DIF/DIFE/VIF/VIFE baytlarından oluştur (ör. "0b6e", "cb086e")"""
+    return f"{dif:02x}{dife.hex()}{vif:02x}{vife.hex()}"
+
+
+def _decode_integer_column(columns):
+    """Küçük endian işaretsiz tamsayı sütununu çözümle"""
+    shifts = np.arange(columns.shape[1], dtype=np.uint64) * np.uint64(8)
+    return (columns.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+
+
+def _decode_bcd_column(columns):
+    """BCD sütununu çözümle (decode_bcd gibi 1000'e bölünür, geçersiz BCD -> NaN)"""
+    low = columns & 0x0F
+    high = columns >> 4
+    weights = 10.0 ** (2 * np.arange(columns.shape[1]))
+    value = (low * weights + high * weights * 10).sum(axis=1)
+    invalid = ((low > 9) | (high > 9)).any(axis=1)
+    value[invalid] = np.nan
+    return value / 1000
+
+
+def _decode_real_column(columns):
+    """32 bit float sütununu çözümle"""
+    return np.ascontiguousarray(columns).view("<f4").ravel().astype(np.float64)
+
+
+def _decode_python_column(columns, decoder):
+    """Vektörel karşılığı olmayan alanları (tarih/zaman) satır satır çözümle"""
+    return np.array([decoder(row.tobytes()) for row in columns], dtype=object)
+
+
+def _decode_column(columns, dif, vif):
+    length = columns.shape[1]
+    value_kind = dif.value_kind
+    if value_kind == "bcd":
+        return _decode_bcd_column(columns)
+    elif value_kind == "real":
+        if length != 4:
+            return np.full(len(columns), None, dtype=object)
+        return _decode_real_column(columns)
+    elif vif.date_kind == "date":
+        return _decode_python_column(columns, decode_date)
+    elif vif.date_kind == "datetime":
+        return _decode_python_column(columns, decode_time)
+    elif value_kind == "integer" and length in (1, 2, 3, 4, 6, 8):
+        return _decode_integer_column(columns)
+    return np.full(len(columns), None, dtype=object)
+
+
+def decode_group(compiled, payloads):
+    """
+    Aynı düzendeki payload'ları sütunsal olarak çözümle
+
+    compiled: CompiledFormat
+    payloads: Düzene uyan payload bytes listesi
+
+    Returns:
+        dict: Alan adı -> ndarray
+    """
+    matrix = np.frombuffer(b"".join(payloads), dtype=np.uint8).reshape(len(payloads), compiled.length)
+
+    columns = {}
+    for start, end, dif_byte, dife, vif_byte, vife, _ in compiled.fields:
+        dif = DIF_TABLE[dif_byte]
+        vif = VIF_TABLE[vif_byte]
+        values = _decode_column(matrix[:, start:end], dif, vif)
+        if not vif.date_kind and values.dtype != object:
+            values = values * vif.multiplier
+
+        name = field_name(dif_byte, dife, vif_byte, vife)
+        if name in columns:
+            name = f"{name}_{start}"
+        columns[name] = values
+    return columns
+
+
+def decode_columnar(frames, keys=None, format_cache=FORMAT_CACHE):
+    """
+    Telgrafları kayıt düzenlerine göre gruplayıp sütunsal olarak çözümle
+
+    frames: bytes / bytearray / memoryview telgraflarından oluşan iterable
+    keys: Tek AES anahtarı, sayaç adresine göre anahtar sözlüğü veya MeterKeyStore (parse_many ile aynı)
+    format_cache: Düzen önbelleği (her sayacın ilk telgrafı yürünerek öğrenilir)
+
+    Returns:
+        tuple: (ColumnarGroup listesi, standart DIF/VIF çözümlemesine girmeyen
+                telgrafların sıra numaraları)
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("Sütunsal çözümleme için numpy kurulu olmalıdır")
+
+    if format_cache is None:
+        format_cache = FormatCache()
+
+    key, key_map = _normalize_keys(keys)
+
+    groups = {}
+    rejected = []
+    for index, frame in enumerate(frames):
+        if not isinstance(frame, bytes):
+            frame = bytes(frame)
+        result = _parse_frame(frame, key=key, keys=key_map, hex_output=False, lazy=True)
+
+        # Bloklar ertelenmemişse telgraf standart DIF/VIF payload'ı taşımıyor
+        # (özel CI, kompakt telgraf, çözülemeyen şifre vb.)
+        if result is None or result.blocks_decoded:
+            rejected.append(index)
+            continue
+
+        payload = result["raw_payload"]
+        meter_key = frame[2:10]
+        compiled = format_cache.lookup(meter_key, payload)
+        if compiled is None:
+            _parse_data_blocks(payload, compact=True, format_cache=format_cache, meter_key=meter_key)
+            compiled = format_cache.lookup(meter_key, payload)
+            if compiled is None:
+                rejected.append(index)
+                continue
+
+        group_key = (compiled.length, compiled.mask, compiled.expected)
+        group = groups.get(group_key)
+        if group is None:
+            group = groups[group_key] = (compiled, [], [], [])
+        group[1].append(index)
+        group[2].append(result["telegram_info"]["address"])
+        group[3].append(payload)
+
+    output = []
+    for compiled, rows, addresses, payloads in groups.values():
+        group = ColumnarGroup(compiled, np.array(rows), addresses)
+        group.columns = decode_group(compiled, payloads)
+        for (start, end, dif_byte, dife, vif_byte, vife, _), name in zip(compiled.fields, group.columns):
+            group.units[name] = VIF_TABLE[vif_byte].unit
+        output.append(group)
+
+    logger.info(f"Sütunsal çözümleme: {len(output)} düzen grubu, {len(rejected)} telgraf dışarıda kaldı")
+    return output, rejected
@@ -1,5 +1,226 @@
 # wmbus_crypto.py - wM-Bus şifreleme ve şifre çözme işlemleri
+# Projedeki tüm AES işlemleri (CBC, toplu çözme, mod 7 anahtar türetme, CMAC)
+# bu modüldeki motor üzerinden yapılır.
+import threading
+from collections import OrderedDict
 from Crypto.Cipher import AES
+from Crypto.Hash import CMAC
+
+
+class AESEngine:
+    """
+    Anahtar başına hazırlanmış AES durumunu önbellekte tutan şifreleme motoru.
+
+    AES.new her çağrıda anahtar genişletmesini (key schedule) yeniden yapar.
+    Sayaç anahtarları değişmediği için her anahtarın ECB şifre nesnesi bir kez
+    oluşturulur ve saklanır; CBC bu nesne üzerine kurulur. Önbellek LRU ile
+    sınırlandırılır. Önbellek bir kilitle korunur; motor şifre çözme thread
+    havuzundan (wmbus_parallel.DecryptionStage) paylaşılarak kullanılabilir.
+
+    Güvenlik modu 7 için AES-CMAC ile türetilen mesaj anahtarları da
+    (ana anahtar, AFL sayacı, sayaç ID'si) üçlüsüne göre saklanır; aynı sayaçla
+    tekrar gelen telgraflar (tekrarlayıcılar) anahtarı yeniden türetmez.
+
+    max_keys: Önbellekte tutulacak en fazla anahtar sayısı
+    max_derived: Önbellekte tutulacak en fazla türetilmiş anahtar çifti sayısı
+    """
+
+    def __init__(self, max_keys=20000, max_derived=20000):
+        self.max_keys = max_keys
+        self.max_derived = max_derived
+        self._ciphers = OrderedDict()
+        self._derived = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.kdf_hits = 0
+        self.kdf_misses = 0
+
+    def __len__(self):
+        return len(self._ciphers)
+
+    def get_cipher(self, key):
+        """Anahtarın hazır ECB şifre nesnesini döndür (yoksa oluştur)"""
+        key = bytes(key)
+        with self._lock:
+            cipher = self._ciphers.get(key)
+            if cipher is not None:
+                self._ciphers.move_to_end(key)
+                self.hits += 1
+                return cipher
+
+            self.misses += 1
+            cipher = AES.new(key, AES.MODE_ECB)
+            self._ciphers[key] = cipher
+            if len(self._ciphers) > self.max_keys:
+                self._ciphers.popitem(last=False)
+        return cipher
+
+    def decrypt_cbc(self, key, iv, data, cache=True):
+        """
+        AES-CBC şifresini çöz (dolgu kaldırılmaz)
+
+        P[i] = D(C[i]) XOR C[i-1], C[-1] = IV
+
+        cache: False ise şifre nesnesi önbelleğe alınmaz (tek kullanımlık
+               mod 7 mesaj anahtarları önbelleği doldurmasın diye)
+        """
+        if len(data) % 16:
+            raise ValueError("Şifreli veri uzunluğu 16 baytın katı olmalı")
+        cipher = self.get_cipher(key) if cache else AES.new(bytes(key), AES.MODE_ECB)
+        decrypted = cipher.decrypt(data)
+        chain = bytes(iv) + bytes(data[:-16])
+        return (int.from_bytes(decrypted, "big") ^ int.from_bytes(chain, "big")).to_bytes(len(data), "big")
+
+    def decrypt_batch(self, items):
+        """
+        Çok sayıda telgrafı anahtarlarına göre gruplayarak toplu çöz (dolgu kaldırılmaz)
+
+        Aynı anahtarla şifrelenmiş tüm veriler tek bir ECB çağrısında çözülür;
+        sonuçlar tek bir çıktı tamponuna yazılır ve kopyalanmadan bu tampona
+        bakan memoryview'lar olarak döndürülür.
+
+        items: (anahtar, iv, şifreli veri) üçlülerinden oluşan iterable
+               (veri uzunluğu 16 baytın katı olmalı)
+
+        Returns:
+            list: Giriş sırasıyla çözülmüş veriler (memoryview)
+        """
+        items = items if isinstance(items, list) else list(items)
+
+        offsets = []
+        groups = {}
+        total = 0
+        for index, (key, iv, data) in enumerate(items):
+            if len(data) % 16:
+                raise ValueError(f"Şifreli veri uzunluğu 16 baytın katı olmalı (öğe {index})")
+            offsets.append(total)
+            total += len(data)
+            groups.setdefault(bytes(key), []).append(index)
+
+        output = bytearray(total)
+        for key, indexes in groups.items():
+            # Grubun tüm verisi tek ECB çağrısıyla çözülür, CBC zinciri
+            # (IV || C[:-1]) de tek XOR ile uygulanır
+            ciphertext = b"".join(bytes(items[i][2]) for i in indexes)
+            if not ciphertext:
+                continue
+            chain = b"".join(bytes(items[i][1]) + bytes(items[i][2][:-16]) for i in indexes if len(items[i][2]))
+            decrypted = self.get_cipher(key).decrypt(ciphertext)
+            plain = (int.from_bytes(decrypted, "big") ^ int.from_bytes(chain, "big")).to_bytes(len(ciphertext), "big")
+            pos = 0
+            for i in indexes:
+                length = len(items[i][2])
+                output[offsets[i]:offsets[i] + length] = plain[pos:pos + length]
+                pos += length
+
+        view = memoryview(output)
+        return [view[offsets[i]:offsets[i] + len(items[i][2])] for i in range(len(items))]
+
+    def check_first_block(self, key, iv, data, marker=b"\x2f\x2f"):
+        """
+        Yalnızca ilk 16 baytlık bloğu çözüp baştaki doğrulama baytlarını kontrol et
+
+        Yanlış anahtarı tüm veriyi çözmeden, tek bir AES bloğuyla eler.
+        """
+        if len(data) < 16:
+            return False
+        block = self.get_cipher(key).decrypt(bytes(data[:16]))
+        for i, expected in enumerate(marker):
+            if block[i] ^ iv[i] != expected:
+                return False
+        return True
+
+    def encrypt_cbc(self, key, iv, data):
+        """
+        AES-CBC ile şifrele (veri 16 baytın katı olmalı, dolgu eklenmez)
+
+        CBC zinciri şifrelemede bloklar arası bağımlı olduğundan önbellekteki
+        ECB nesnesi kullanılmaz; tüm veri tek bir CBC çağrısıyla şifrelenir.
+        """
+        if len(data) % 16:
+            raise ValueError("Veri uzunluğu 16 baytın katı olmalı")
+        return AES.new(bytes(key), AES.MODE_CBC, bytes(iv)).encrypt(bytes(data))
+
+    def derive_keys(self, key, counter, meter_id):
+        """
+        Güvenlik modu 7 mesaj anahtarlarını türet (KDF seçimi 1, EN 13757-7)
+
+        K = AES-CMAC(ana anahtar, DC || sayaç (4) || ID (4) || 0x07 * 7)
+        DC 0x00 şifreleme (Kenc), 0x01 MAC (Kmac) anahtarını verir.
+
+        key: 16 baytlık ana anahtar
+        counter: AFL mesaj sayacı (4 bayt, telgraftaki sırayla)
+        meter_id: TPL ID'si veya yoksa DLL adresi (4 bayt, telgraftaki sırayla)
+
+        Returns:
+            tuple: (Kenc, Kmac)
+        """
+        cache_key = (bytes(key), bytes(counter), bytes(meter_id))
+        with self._lock:
+            derived = self._derived.get(cache_key)
+            if derived is not None:
+                self._derived.move_to_end(cache_key)
+                self.kdf_hits += 1
+                return derived
+            self.kdf_misses += 1
+
+        key, counter, meter_id = cache_key
+        tail = counter + meter_id + b"\x07" * 7
+        derived = (
+            CMAC.new(key, b"\x00" + tail, ciphermod=AES).digest(),
+            CMAC.new(key, b"\x01" + tail, ciphermod=AES).digest()
+        )
+        with self._lock:
+            self._derived[cache_key] = derived
+            if len(self._derived) > self.max_derived:
+                self._derived.popitem(last=False)
+        return derived
+
+    def clear(self):
+        with self._lock:
+            self._ciphers.clear()
+            self._derived.clear()
+        self.hits = 0
+        self.misses = 0
+        self.kdf_hits = 0
+        self.kdf_misses = 0
+
+    def stats(self):
+        return {
+            "keys": len(self._ciphers),
+            "hits": self.hits,
+            "misses": self.misses,
+            "derived_keys": len(self._derived),
+            "kdf_hits": self.kdf_hits,
+            "kdf_misses": self.kdf_misses
+        }
+
+
+# Varsayılan, süreç genelinde paylaşılan şifreleme motoru
+AES_ENGINE = AESEngine()
+
+
+def decrypt_batch(items):
+    """
+    (anahtar, iv, şifreli veri) üçlülerini varsayılan motorla toplu çöz
+
+    Bkz. AESEngine.decrypt_batch
+    """
+    return AES_ENGINE.decrypt_batch(items)
+
+
+def verify_cmac(key, message, mac):
+    """
+    AES-CMAC doğrula (kırpılmış MAC desteklenir)
+
+    key: 16 baytlık MAC anahtarı
+    message: MAC hesaplanacak veri
+    mac: Telgraftaki MAC (2-16 bayt)
+    """
+    calculated = CMAC.new(bytes(key), bytes(message), ciphermod=AES).digest()
+    return calculated[:len(mac)] == bytes(mac)
+
 
 def decrypt_aes_cbc_iv(encrypted_data, key, iv=None):
     """
@@ -13,12 +234,20 @@ def decrypt_aes_cbc_iv(encrypted_data, key, iv=None):
         # IV yoksa, genellikle ilk 16 bayt IV olarak kullanılır
         iv = b'\x00' * 16  # Veya başka bir varsayılan IV
     
-    cipher = AES.new(key, AES.MODE_CBC, iv)
-    decrypted = cipher.decrypt(encrypted_data)
+    decrypted = AES_ENGINE.decrypt_cbc(key, iv, encrypted_data)
+    return remove_padding(decrypted)
+
+def remove_padding(decrypted):
+    """
+    Çözülmüş veriden PKCS#7 dolgusunu kaldır (dolgu yoksa veri aynen döner)
     
-    # PKCS#7 padding'i kaldır
+    decrypt_batch sonuçları da bu fonksiyonla decrypt_aes_cbc_iv ile aynı
+    biçime getirilir.
+    """
+    if not decrypted:
+        return decrypted
     padding_len = decrypted[-1]
-    if padding_len > 16:
+    if not 0 < padding_len <= 16 or decrypted[-padding_len:] != bytes([padding_len]) * padding_len:
         return decrypted  # Padding yok
     
     return decrypted[:-padding_len]
@@ -35,7 +264,4 @@ def encrypt_aes_cbc_iv(plain_data, key, iv):
     padding_len = 16 - (len(plain_data) % 16)
     padded_data = plain_data + bytes([padding_len] * padding_len)
     
-    cipher = AES.new(key, AES.MODE_CBC, iv)
-    encrypted = cipher.encrypt(padded_data)
-    
-    return encrypted
\ No newline at end of file
+    return AES_ENGINE.encrypt_cbc(key, iv, padded_data)
\ No newline at end of file
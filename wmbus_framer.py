@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""
+wM-Bus Seri Akış Çerçeveleyici
+Seri porttan parça parça gelen baytları (serial.read(in_waiting)) tam wM-Bus
+telgraflarına ayırır. Çerçeve sınırları L alanıyla bulunur; başlık geçerli
+görünmüyorsa (C alanı / üretici kodu) bir bayt atlanarak yeniden senkronize
+olunur. Tampon yeniden kullanılır; tüketilen baytlar her seferinde değil,
+yalnızca belirli bir eşik aşıldığında tampondan silinir.
+"""
+
+import logging
+
+logger = logging.getLogger("wmbus_framer")
+
+# Geçerli kabul edilen C alanları (SND-NR, SND-IR, ACC-NR, ACC-DMD, SND-UD, SND-NKE, RSP-UD ...)
+VALID_C_FIELDS = frozenset({0x06, 0x08, 0x18, 0x28, 0x38, 0x40, 0x44, 0x46, 0x47, 0x48, 0x53, 0x73})
+
+# L alanı en az C, M (2), A (4), versiyon, tip ve CI baytlarını kapsamalı
+MIN_L_FIELD = 10
+
+# Tüketilmiş baytlar bu sınırı aşınca tamponun başı silinir
+COMPACT_THRESHOLD = 4096
+
+
+def _valid_manufacturer(m_field):
+    """Üretici kodu EN 13757-3'e göre üç büyük harfe mi karşılık geliyor?"""
+    if m_field & 0x8000:
+        return False
+    for shift in (10, 5, 0):
+        letter = (m_field >> shift) & 0x1F
+        if letter < 1 or letter > 26:
+            return False
+    return True
+
+
+class WMBusFramer:
+    """
+    Sürekli bayt akışından telgraf çıkaran artımlı çerçeveleyici.
+
+    Kullanım:
+        framer = WMBusFramer()
+        for frame in framer.feed(port.read(port.in_waiting or 1)):
+            parse_many([frame]) ...
+    """
+
+    def __init__(self, c_fields=VALID_C_FIELDS):
+        self.c_fields = c_fields
+        self._buffer = bytearray()
+        self._start = 0
+        self.frames = 0
+        self.dropped_bytes = 0
+
+    def __len__(self):
+        """Tamponda bekleyen (henüz çerçevelenmemiş) bayt sayısı"""
+        return len(self._buffer) - self._start
+
+    def _header_ok(self, buffer, pos):
+        if buffer[pos] < MIN_L_FIELD:
+            return False
+        if buffer[pos + 1] not in self.c_fields:
+            return False
+        return _valid_manufacturer(buffer[pos + 2] | (buffer[pos + 3] << 8))
+
+    def feed(self, chunk):
+        """
+        Yeni gelen baytları ekle ve tamamlanan telgrafları döndür
+
+        chunk: bytes / bytearray / memoryview
+
+        Returns:
+            list: Tamamlanan telgraflar (bytes)
+        """
+        buffer = self._buffer
+        buffer += chunk
+        start = self._start
+        end = len(buffer)
+        frames = []
+
+        with memoryview(buffer) as view:
+            while end - start >= 4:
+                if not self._header_ok(buffer, start):
+                    # Yeniden senkronizasyon: bir bayt atla
+                    start += 1
+                    self.dropped_bytes += 1
+                    continue
+                frame_length = buffer[start] + 1
+                if end - start < frame_length:
+                    break
+                frames.append(view[start:start + frame_length].tobytes())
+                start += frame_length
+
+        if start >= end:
+            buffer.clear()
+            start = 0
+        elif start >= COMPACT_THRESHOLD:
+            del buffer[:start]
+            start = 0
+        self._start = start
+
+        self.frames += len(frames)
+        return frames
+
+    def idle(self):
+        """
+        Akışta boşluk oluştuğunda (okuma zaman aşımı) yarım kalan veriyi at
+
+        Seri port zaman aşımıyla boş döndüğünde çağrılmalıdır; böylece bozuk
+        bir L alanı nedeniyle beklenen olmayan baytlar sonraki telgrafı bozmaz.
+        """
+        pending = len(self)
+        if pending:
+            logger.debug(f"Akış boşluğu: {pending} bayt yarım telgraf atıldı")
+            self.dropped_bytes += pending
+        self._buffer.clear()
+        self._start = 0
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "dropped_bytes": self.dropped_bytes,
+            "pending_bytes": len(self)
+        }
+
+
+def read_serial_frames(port, framer=None, stop=None):
+    """
+    Açık bir seri porttan telgrafları sürekli oku (generator)
+
+    port: serial.Serial örneği (timeout ayarlı olmalı)
+    framer: Kullanılacak WMBusFramer (None ise yenisi oluşturulur)
+    stop: Okumanın bitmesi gerektiğinde True döndüren fonksiyon (opsiyonel)
+    """
+    if framer is None:
+        framer = WMBusFramer()
+    while stop is None or not stop():
+        data = port.read(port.in_waiting or 1)
+        if data:
+            yield from framer.feed(data)
+        else:
+            framer.idle()
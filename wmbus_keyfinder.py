@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""
+wM-Bus Anahtar Keşif Aracı
+Yakalanan şifreli telgraflara aday AES anahtarlarını dener ve her sayaç için
+doğru anahtarı bulur. Her deneme yalnızca ilk 16 baytlık bloğu çözüp 0x2F2F
+doğrulama baytlarını kontrol eder; bu sayede binlerce anahtar × binlerce sayaç
+taraması tam şifre çözme yapılmadan tamamlanır.
+
+Kullanım:
+    python wmbus_keyfinder.py -c yakalama.txt -k adaylar.txt [-K sayaclar.syc] [-o bulunan.csv]
+"""
+
+import csv
+import os
+import sys
+import logging
+import argparse
+
+from wmbus_crypto import AES_ENGINE
+from wmbus_keystore import MeterKeyStore, parse_key
+from wmbus_parser import encryption_sample
+from wmbus_utils import format_manufacturer_code
+
+logger = logging.getLogger("wmbus_keyfinder")
+
+# Anahtarın kabulü için doğrulanması gereken en fazla telgraf sayısı (sayaç başına).
+# 0x2F2F kontrolü tek telgrafta 1/65536 olasılıkla yanlış pozitif verebilir.
+SAMPLES_PER_METER = 2
+
+
+def find_keys(frames, candidates, key_store=None, samples=SAMPLES_PER_METER):
+    """
+    Sayaçların anahtarlarını aday listesinden bul
+
+    frames: bytes telgraflarından oluşan iterable
+    candidates: Aday anahtarlar (hex string veya bytes)
+    key_store: Mevcut MeterKeyStore (verilirse önce kayıtlı anahtar denenir)
+    samples: Sayaç başına doğrulanacak en fazla telgraf sayısı
+
+    Returns:
+        list: Her sayaç için {"address", "m_field", "key", "status"} sözlüğü.
+              status: "doğrulandı" (kayıtlı anahtar doğru), "bulundu" (kayıtlı
+              anahtar yok ya da yanlış, adaylardan biri doğru) veya "bulunamadı"
+    """
+    keys = []
+    for candidate in candidates:
+        key = parse_key(candidate)
+        if key is None:
+            logger.warning(f"Geçersiz aday anahtar atlandı: {candidate!r}")
+        else:
+            keys.append(key)
+    keys = list(dict.fromkeys(keys))
+
+    meters = {}
+    for frame in frames:
+        sample = encryption_sample(bytes(frame))
+        if sample is None:
+            continue
+        meter, iv, payload = sample
+        meter_samples = meters.setdefault(meter, [])
+        if len(meter_samples) < samples:
+            meter_samples.append((iv, payload))
+
+    results = []
+    for (m_field, address), meter_samples in meters.items():
+        def verify(key):
+            return all(AES_ENGINE.check_first_block(key, iv, payload) for iv, payload in meter_samples)
+
+        known = key_store.lookup(m_field, address) if key_store is not None else None
+        if known is not None and verify(known):
+            results.append({"address": address, "m_field": m_field, "key": known, "status": "doğrulandı"})
+            continue
+
+        found = next((key for key in keys if key != known and verify(key)), None)
+        results.append({
+            "address": address,
+            "m_field": m_field,
+            "key": found,
+            "status": "bulundu" if found is not None else "bulunamadı"
+        })
+
+    found = sum(1 for r in results if r["status"] == "bulundu")
+    logger.info(f"Anahtar keşfi: {len(results)} şifreli sayaç, {found} anahtar bulundu, "
+                f"{len(keys)} aday denendi")
+    return results
+
+
+def read_candidates(path):
+    """Aday anahtarları oku: anahtar dosyası (.syc/.xlsx/.csv) ya da her satırda bir hex anahtar"""
+    if os.path.splitext(path)[1].lower() in (".syc", ".xlsx", ".xlsm", ".csv"):
+        store = MeterKeyStore()
+        store.load(path)
+        return store.unique_keys()
+    with open(path, mode="r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def _manufacturer_text(m_field):
+    code = format_manufacturer_code(m_field)
+    return code if code.isalpha() and code.isupper() else f"0x{m_field:04x}"
+
+
+def write_results(results, path):
+    """Bulunan anahtarları MeterKeyStore'un yükleyebileceği CSV dosyasına yaz"""
+    with open(path, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["address", "manufacturer", "key", "status"])
+        for r in results:
+            if r["key"] is not None:
+                writer.writerow([r["address"], _manufacturer_text(r["m_field"]), r["key"].hex().upper(), r["status"]])
+
+
+def main():
+    from wmbus_parallel import read_capture_file
+
+    parser = argparse.ArgumentParser(description="wM-Bus Anahtar Keşif Aracı")
+    parser.add_argument("-c", "--capture", required=True, help="Yakalama dosyası (her satırda bir hex telgraf)")
+    parser.add_argument("-k", "--candidates", required=True, help="Aday anahtar dosyası")
+    parser.add_argument("-K", "--keys", help="Mevcut sayaç anahtar dosyası (.syc, .xlsx veya .csv)")
+    parser.add_argument("-o", "--output", help="Bulunan anahtarların yazılacağı CSV dosyası")
+    args = parser.parse_args()
+
+    key_store = None
+    if args.keys:
+        key_store = MeterKeyStore()
+        key_store.load(args.keys)
+
+    results = find_keys(read_capture_file(args.capture), read_candidates(args.candidates), key_store)
+    for r in results:
+        key = r["key"].hex().upper() if r["key"] is not None else "-"
+        print(f"{r['address']} {_manufacturer_text(r['m_field'])} {r['status']} {key}")
+
+    if args.output:
+        write_results(results, args.output)
+        print(f"Sonuçlar kaydedildi: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+
+"""
+wM-Bus Sayaç Anahtar Deposu
+Sayaç AES anahtarlarını .syc, Excel (.xlsx) ve CSV dosyalarından yükler ve
+(üretici, adres) çiftine göre indeksler. Anahtarlar yükleme sırasında bir kez
+doğrulanıp bytes olarak saklanır; çözümleyici her telgrafta anahtarı O(1)
+sözlük aramasıyla kendisi bulur.
+
+Yeniden yükleme artımlıdır: dosya değişmemişse hiç okunmaz, değişmişse yalnızca
+eklenen, değişen ve silinen satırlar depoya yansıtılır.
+"""
+
+import os
+import csv
+import binascii
+import logging
+
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+from wmbus_constants import MANUFACTURER_CODES
+from wmbus_utils import parse_manufacturer_code
+
+logger = logging.getLogger("wmbus_keystore")
+
+# Sütun başlıkları (büyük/küçük harf duyarsız); EnerjiPay-RF tablosu ve
+# İngilizce başlıklı CSV dosyaları desteklenir
+ADDRESS_COLUMNS = ("sayaç no", "adres", "address", "id", "meter")
+KEY_COLUMNS = ("aes key", "anahtar", "key", "aes")
+MANUFACTURER_COLUMNS = ("üretici", "manufacturer", "mfct")
+
+_MANUFACTURER_NAMES = {name.lower(): code for code, name in MANUFACTURER_CODES.items()}
+
+
+def normalize_address(address):
+    """Sayaç numarasını çözümleyicinin adres biçimine çevir (8 haneli, küçük harf hex)"""
+    address = str(address).strip().replace(" ", "").lower()
+    if address.startswith("0x"):
+        address = address[2:]
+    if address.endswith(".0"):
+        # Excel sayısal hücreleri float olarak okunabilir
+        address = address[:-2]
+    return address.zfill(8)
+
+
+def normalize_manufacturer(manufacturer):
+    """
+    Üretici bilgisini M alanı değerine çevir
+
+    "KAM", "0x2c2d", "Kamstrup" veya sayı kabul edilir; tanınmayan ya da boş
+    değerler None döner (anahtar yalnızca adrese göre eşleşir).
+    """
+    if manufacturer is None:
+        return None
+    if isinstance(manufacturer, int):
+        return manufacturer
+    text = str(manufacturer).strip()
+    if not text:
+        return None
+    if text.lower().startswith("0x"):
+        try:
+            return int(text, 16)
+        except ValueError:
+            return None
+    if len(text) == 3 and text.isalpha() and text.isascii():
+        return parse_manufacturer_code(text.upper())
+    return _MANUFACTURER_NAMES.get(text.lower())
+
+
+def parse_key(key):
+    """
+    AES anahtarını doğrula ve bytes'a çevir
+
+    Returns:
+        bytes or None: 16 baytlık anahtar, geçersizse None
+    """
+    if isinstance(key, (bytes, bytearray)):
+        key_bytes = bytes(key)
+    else:
+        text = str(key).strip().replace(" ", "")
+        if text.lower().startswith("0x"):
+            text = text[2:]
+        try:
+            key_bytes = binascii.unhexlify(text)
+        except (binascii.Error, ValueError):
+            return None
+    if len(key_bytes) != 16:
+        return None
+    return key_bytes
+
+
+def _find_column(headers, names):
+    lowered = [str(h).strip().lower() if h is not None else "" for h in headers]
+    for name in names:
+        if name in lowered:
+            return lowered.index(name)
+    return None
+
+
+def _read_rows(path):
+    """Dosyadaki satırları (başlık, satırlar) olarak oku"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        if not OPENPYXL_AVAILABLE:
+            raise ImportError("Excel dosyaları için openpyxl kurulu olmalıdır")
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = [["" if cell is None else str(cell) for cell in row]
+                    for row in wb.active.iter_rows(values_only=True)]
+        finally:
+            wb.close()
+    else:
+        with open(path, mode="r", encoding="utf-8", newline="") as f:
+            if ext == ".syc":
+                delimiter = "|"
+            else:
+                sample = f.read(4096)
+                f.seek(0)
+                try:
+                    delimiter = csv.Sniffer().sniff(sample, delimiters="|;,\t").delimiter
+                except csv.Error:
+                    delimiter = ","
+            rows = [["" if cell == "None" else cell for cell in row] for row in csv.reader(f, delimiter=delimiter)]
+
+    if not rows:
+        return [], []
+    return rows[0], rows[1:]
+
+
+class MeterKeyStore:
+    """
+    (üretici, adres) -> AES anahtarı (bytes) deposu.
+
+    Kullanım:
+        store = MeterKeyStore()
+        store.load("sayaclar.syc")
+        parse_many(frames, keys=store)
+        ...
+        store.reload()   # yalnızca değişen dosyalar / satırlar işlenir
+
+    Üreticisi belirtilmemiş satırlar tüm üreticiler için adresle eşleşir.
+
+    Aynı sayaç birden fazla kaynakta (dosyalar, set_key) bulunabilir; en son
+    yazan kaynağın anahtarı geçerlidir. Bir kaynaktan satır silinirse sayaç
+    kalan kaynakların en son yazanının anahtarına döner.
+    """
+
+    def __init__(self):
+        self._keys = {}       # (m_field veya None, adres) -> bytes
+        self._owners = {}     # (m_field veya None, adres) -> {kaynak: bytes} (yazılma sırasıyla)
+        self._sources = {}    # dosya yolu -> {"stamp": ..., "rows": {(m_field, adres): ham anahtar}}
+        self.invalid = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, m_field, address):
+        """
+        Sayaç anahtarını bul
+
+        m_field: Telgraftaki M alanı (int, ör. 0x2c2d)
+        address: Çözümleyicinin adres stringi (ör. "31138762")
+        """
+        key = self._keys.get((m_field, address))
+        if key is None:
+            key = self._keys.get((None, address))
+        return key
+
+    def _assign(self, ident, source, key_bytes):
+        """Kaynağın anahtarını yaz (kaynak: dosya yolu, set_key için None)"""
+        owners = self._owners.setdefault(ident, {})
+        owners.pop(source, None)
+        owners[source] = key_bytes
+        self._keys[ident] = key_bytes
+
+    def _release(self, ident, source):
+        """Kaynağın anahtarını geri çek; başka kaynak varsa onun anahtarına dön"""
+        owners = self._owners.get(ident)
+        if owners is None:
+            return
+        owners.pop(source, None)
+        if owners:
+            self._keys[ident] = next(reversed(owners.values()))
+        else:
+            del self._owners[ident]
+            self._keys.pop(ident, None)
+
+    def unique_keys(self):
+        """Depodaki farklı anahtarlar (anahtar keşfi için aday listesi)"""
+        return list(dict.fromkeys(self._keys.values()))
+
+    def set_key(self, address, key, manufacturer=None):
+        """
+        Tek bir sayacın anahtarını ekle / güncelle (tablodaki tek satır düzenlemesi)
+
+        Returns:
+            bool: Anahtar geçerliyse True
+        """
+        key_bytes = parse_key(key)
+        if key_bytes is None:
+            logger.warning(f"Geçersiz AES anahtarı atlandı: sayaç {address}")
+            self.invalid += 1
+            return False
+        self._assign((normalize_manufacturer(manufacturer), normalize_address(address)), None, key_bytes)
+        return True
+
+    def remove_key(self, address, manufacturer=None):
+        """Sayacın anahtarını depodan (tüm kaynaklardan) çıkar"""
+        ident = (normalize_manufacturer(manufacturer), normalize_address(address))
+        self._owners.pop(ident, None)
+        return self._keys.pop(ident, None) is not None
+
+    def update(self, mapping):
+        """{adres: anahtar} sözlüğündeki anahtarları ekle"""
+        for address, key in mapping.items():
+            self.set_key(address, key)
+        return self
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        return cls().update(mapping)
+
+    def load(self, path):
+        """
+        .syc / .xlsx / .csv dosyasından anahtarları yükle (artımlı)
+
+        Dosya daha önce yüklenmişse ve değişmemişse okunmaz. Değişmişse önceki
+        yüklemeye göre yalnızca eklenen, değişen ve silinen satırlar uygulanır.
+
+        Returns:
+            dict: {"added", "updated", "removed", "unchanged", "invalid"} sayıları
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        summary = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "invalid": 0}
+
+        source = self._sources.get(path)
+        if source is not None and source["stamp"] == stamp:
+            summary["unchanged"] = len(source["rows"])
+            return summary
+
+        headers, rows = _read_rows(path)
+        address_col = _find_column(headers, ADDRESS_COLUMNS)
+        key_col = _find_column(headers, KEY_COLUMNS)
+        manufacturer_col = _find_column(headers, MANUFACTURER_COLUMNS)
+        if address_col is None or key_col is None:
+            raise ValueError(f"{os.path.basename(path)}: sayaç numarası veya AES anahtarı sütunu bulunamadı")
+
+        previous = source["rows"] if source is not None else {}
+        current = {}
+        for row in rows:
+            if len(row) <= max(address_col, key_col):
+                continue
+            address = row[address_col].strip()
+            raw_key = row[key_col].strip()
+            if not address or not raw_key:
+                continue
+            manufacturer = row[manufacturer_col] if manufacturer_col is not None and manufacturer_col < len(row) else None
+            ident = (normalize_manufacturer(manufacturer), normalize_address(address))
+
+            if previous.get(ident) == raw_key:
+                # Satır değişmemiş: yeniden doğrulama yok
+                current[ident] = raw_key
+                summary["unchanged"] += 1
+                continue
+
+            key_bytes = parse_key(raw_key)
+            if key_bytes is None:
+                logger.warning(f"{os.path.basename(path)}: sayaç {address} için geçersiz AES anahtarı atlandı")
+                summary["invalid"] += 1
+                continue
+
+            summary["updated" if ident in previous else "added"] += 1
+            current[ident] = raw_key
+            self._assign(ident, path, key_bytes)
+
+        for ident in previous.keys() - current.keys():
+            self._release(ident, path)
+            summary["removed"] += 1
+
+        self._sources[path] = {"stamp": stamp, "rows": current}
+        self.invalid += summary["invalid"]
+        logger.info(f"Anahtar deposu {os.path.basename(path)}: {summary}")
+        return summary
+
+    def reload(self):
+        """Yüklenmiş tüm dosyaları artımlı olarak yeniden yükle"""
+        summary = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "invalid": 0}
+        for path in list(self._sources):
+            try:
+                for name, count in self.load(path).items():
+                    summary[name] += count
+            except OSError as e:
+                logger.warning(f"Anahtar dosyası okunamadı: {path}: {e}")
+        return summary
+
+    def stats(self):
+        return {
+            "keys": len(self._keys),
+            "sources": len(self._sources),
+            "invalid": self.invalid
+        }
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+
+"""
+wM-Bus Paralel Toplu Çözümleme
+Büyük yakalama dosyalarını bir süreç havuzuna bölerek çözümler. Her işçi
+süreç sürücü kayıtlarını (DriverManager) başlangıçta bir kez yükler; telgraflar
+parçalar halinde işçilere gönderilir ve sonuçlar giriş sırasıyla ya da
+tamamlanma sırasıyla döndürülür.
+
+Canlı akış için DecryptionStage, çerçeveleyici ile blok çözümleyici arasında
+thread havuzlu bir şifre çözme aşaması sağlar.
+"""
+
+import os
+import queue
+import binascii
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from wmbus_parser import FORMAT_CACHE, _normalize_keys, _parse_frame, decrypt_frames
+
+logger = logging.getLogger("wmbus_parallel")
+
+# İşçi süreç durumu (_init_worker tarafından doldurulur)
+_worker = {}
+
+
+def _init_worker(keys, use_drivers, hex_output):
+    """İşçi süreç başlangıcı: anahtarları hazırla ve sürücü kayıtlarını bir kez yükle"""
+    _worker["key"], _worker["key_map"] = _normalize_keys(keys)
+    _worker["hex_output"] = hex_output
+    _worker["apply_driver"] = None
+    if use_drivers:
+        try:
+            import driver_manager
+            driver_manager.get_driver_manager()
+            _worker["apply_driver"] = driver_manager.apply_driver
+        except ImportError:
+            logger.warning("wM-Bus cihaz sürücüleri bulunamadı, sürücüsüz çözümleniyor")
+
+
+def _parse_chunk(chunk):
+    """Bir telgraf parçasını çözümle; (sıra, sonuç) listesi döndürür"""
+    key = _worker["key"]
+    key_map = _worker["key_map"]
+    hex_output = _worker["hex_output"]
+    apply_driver = _worker["apply_driver"]
+
+    # Parçadaki mod 5 şifreli telgraflar anahtarlarına göre gruplanıp toplu çözülür
+    if key is not None or key_map is not None:
+        try:
+            batch = decrypt_frames([frame for _, frame in chunk], key, key_map)
+        except Exception as e:
+            logger.error(f"Toplu şifre çözme hatası, telgraflar tek tek çözülecek: {e}")
+            batch = [None] * len(chunk)
+    else:
+        batch = [None] * len(chunk)
+
+    results = []
+    for (index, frame), predecrypted in zip(chunk, batch):
+        try:
+            result = _parse_frame(frame, key=key, keys=key_map, hex_output=hex_output, format_cache=FORMAT_CACHE,
+                                  predecrypted=predecrypted)
+            if result and apply_driver is not None:
+                result = apply_driver(result)
+        except Exception as e:
+            logger.error(f"Telgraf {index} çözümlenirken hata: {e}")
+            result = None
+        results.append((index, result))
+    return results
+
+
+def _chunked(frames, chunksize):
+    chunk = []
+    for index, frame in enumerate(frames):
+        chunk.append((index, frame if isinstance(frame, bytes) else bytes(frame)))
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_parallel(frames, jobs=None, keys=None, use_drivers=True, ordered=True, chunksize=256, hex_output=True):
+    """
+    Telgrafları süreç havuzunda paralel olarak çözümle (generator)
+
+    frames: bytes / bytearray / memoryview telgraflarından oluşan iterable
+    jobs: İşçi süreç sayısı (None ise CPU sayısı; 1 ise havuz kurulmaz)
+    keys: Tek AES anahtarı, sayaç adresine göre anahtar sözlüğü veya MeterKeyStore (parse_many ile aynı)
+    use_drivers: Sonuçlara cihaz sürücüsü uygulansın mı?
+    ordered: True ise sonuçlar giriş sırasıyla, False ise tamamlanma sırasıyla döner
+    chunksize: İşçiye tek seferde gönderilen telgraf sayısı
+    hex_output: Ham veri alanları hex string olarak mı dönsün? (sürücüler payload'ı her iki durumda da bytes olarak alır)
+
+    Her telgraf için (sıra numarası, sonuç) çifti üretir; çözümlenemeyen
+    telgrafların sonucu None olur.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    chunks = _chunked(frames, chunksize)
+
+    if jobs <= 1:
+        _init_worker(keys, use_drivers, hex_output)
+        for chunk in chunks:
+            yield from _parse_chunk(chunk)
+        return
+
+    # Bellekte bekleyen parça sayısını sınırla (milyonlarca telgraflık dosyalar için)
+    max_in_flight = jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(keys, use_drivers, hex_output)) as executor:
+        if ordered:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_parse_chunk, chunk))
+                if len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        else:
+            pending = set()
+            for chunk in chunks:
+                pending.add(executor.submit(_parse_chunk, chunk))
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+
+
+class DecryptionStage:
+    """
+    Çerçeveleyici (WMBusFramer) ile blok çözümleyici arasında şifre çözme aşaması.
+
+    pycryptodome AES işlemleri sırasında GIL'i bıraktığı için büyük şifreli
+    payload'lar thread'lerde çözülürken seri port okuma, çerçeveleme ve sürücü
+    işleri devam edebilir. İşçiler DLL/TPL başlığını ve şifre çözmeyi yapar;
+    veri blokları tembel (lazy) bırakılır ve sonucu tüketen thread'de ilk
+    erişimde çözümlenir.
+
+    Her sayaç (M + A alanı) her zaman aynı şeride (tek işçili ThreadPoolExecutor)
+    gider; böylece bir sayacın telgrafları geliş sırasıyla çıkar. Tamamlanmış ama
+    henüz alınmamış sonuçlar dahil en fazla max_in_flight telgraf bekleyebilir;
+    sınır dolunca submit() tüketici sonuç alana kadar bekler.
+
+    Kullanım (okuyucu ve tüketici ayrı thread'lerde):
+        stage = DecryptionStage(keys=store)
+        # okuyucu thread
+        for frame in read_serial_frames(port):
+            stage.submit(frame)
+        # tüketici thread (ör. GUI zamanlayıcısı)
+        for frame, result in stage.drain():
+            driver_manager.apply_driver(result)
+
+    Tek thread'den kullanım için process() generator'ı vardır.
+    """
+
+    def __init__(self, keys=None, workers=4, max_in_flight=256, hex_output=True, format_cache=FORMAT_CACHE):
+        self._key, self._key_map = _normalize_keys(keys)
+        self.hex_output = hex_output
+        self.format_cache = format_cache
+        self._lanes = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"wmbus-decrypt-{i}")
+                       for i in range(max(1, workers))]
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._done = queue.Queue()
+        # Sayaçlar şerit thread'lerinden ve tüketiciden eşzamanlı güncellenir
+        self._counter_lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def pending(self):
+        """Gönderilmiş ama henüz alınmamış telgraf sayısı"""
+        return self.submitted - self.completed
+
+    def _decrypt(self, frame):
+        try:
+            result = _parse_frame(frame, key=self._key, keys=self._key_map, hex_output=self.hex_output,
+                                  lazy=True, format_cache=self.format_cache)
+        except Exception as e:
+            logger.error(f"Telgraf çözülürken hata: {e}")
+            with self._counter_lock:
+                self.errors += 1
+            result = None
+        self._done.put((frame, result))
+
+    def submit(self, frame, timeout=None):
+        """
+        Telgrafı şifre çözme kuyruğuna ekle
+
+        Bekleyen telgraf sayısı max_in_flight'a ulaştıysa yer açılana kadar
+        (en fazla timeout saniye) bekler.
+
+        Returns:
+            bool: Telgraf kuyruğa eklendiyse True, zaman aşımında False
+        """
+        if not self._slots.acquire(timeout=timeout):
+            return False
+        if not isinstance(frame, bytes):
+            frame = bytes(frame)
+        lane = self._lanes[hash(frame[2:8]) % len(self._lanes)]
+        with self._counter_lock:
+            self.submitted += 1
+        lane.submit(self._decrypt, frame)
+        return True
+
+    def get(self, timeout=None):
+        """
+        Tamamlanmış bir sonucu al: (telgraf, sonuç)
+
+        Sonuç LazyTelegramResult'tır (çözümlenemeyen telgraflar için None).
+        timeout içinde sonuç yoksa queue.Empty fırlatır.
+        """
+        item = self._done.get(timeout=timeout)
+        with self._counter_lock:
+            self.completed += 1
+        self._slots.release()
+        return item
+
+    def drain(self):
+        """Şu an hazır olan tüm sonuçları beklemeden döndür (generator)"""
+        while True:
+            try:
+                yield self.get(timeout=0)
+            except queue.Empty:
+                return
+
+    def process(self, frames):
+        """
+        Telgrafları aşamadan geçir ve sonuçları üret (tek thread'li kullanım)
+
+        Kuyruk doluyken yeni telgraf göndermek yerine hazır sonuçlar üretilir;
+        sonunda kalan tüm sonuçlar beklenir.
+        """
+        for frame in frames:
+            while not self.submit(frame, timeout=0):
+                yield self.get()
+            yield from self.drain()
+        while self.pending:
+            yield self.get()
+
+    def close(self, wait=True):
+        for lane in self._lanes:
+            lane.shutdown(wait=wait)
+
+    def stats(self):
+        with self._counter_lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "pending": self.submitted - self.completed,
+                "errors": self.errors
+            }
+
+
+def read_capture_file(path):
+    """
+    Yakalama dosyasından telgrafları oku (her satırda bir hex telgraf)
+
+    Boş satırlar ve '#' ile başlayan satırlar atlanır; geçersiz hex satırları
+    uyarı ile atlanır.
+    """
+    with open(path, mode="r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip().replace(" ", "")
+            if not line or line.startswith("#"):
+                continue
+            try:
+                yield binascii.unhexlify(line)
+            except binascii.Error as e:
+                logger.warning(f"{path}:{line_number} geçersiz hex satırı atlandı: {e}")
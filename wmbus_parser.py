@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 
 import binascii
+import hashlib
 import struct
+import time
 import logging
+import threading
 import argparse
+import multiprocessing
+from collections import namedtuple, OrderedDict
+from functools import partial
 from datetime import datetime
 import json
 
@@ -19,9 +25,6 @@ except ImportError:
     DRIVERS_AVAILABLE = False
     logger.info("wM-Bus cihaz sürücüleri bulunamadı.")
 
-# AES şifre çözme için pycryptodome kütüphanesini kullanıyoruz
-from Crypto.Cipher import AES
-
 # Sabit değerleri içe aktar
 from wmbus_constants import (
     MANUFACTURER_CODES, 
@@ -40,11 +43,17 @@ from wmbus_utils import (
     decode_date,
     decode_time,
     calculate_iv,
+    build_iv,
+    crc16_en13757,
     decrypt_aes_cbc_iv,
     format_manufacturer_code,
+    parse_manufacturer_code,
     add_measurement_block
 )
 
+from wmbus_crypto import AES_ENGINE, encrypt_aes_cbc_iv, remove_padding, verify_cmac
+from wmbus_keystore import MeterKeyStore
+
 # Loglama ayarları
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(levelname)s - %(message)s')
@@ -109,22 +118,837 @@ def parse_vife(vife_byte):
     }
 
 
-def parse_wmbus_telegram(hex_data, key=None, verbose=True, output_format="text", use_drivers=True):
-    """Tam bir wM-Bus telgrafını çözümle"""
+def parse_dife(dife_byte):
+    """DIFE (DIF Extension) alanını çözümle"""
+    return {
+        "byte": f"0x{dife_byte:02x}",
+        "storage_number_bit": (dife_byte & 0x40) >> 6,
+        "tariff_bit": (dife_byte & 0x30) >> 4,
+        "device_unit_bit": dife_byte & 0x0F,
+        "extension_bit": (dife_byte & 0x80) >> 7
+    }
+
+
+# Blok döngüsünde kullanılan, 256 bayt değeri için önceden hesaplanmış çözümleme kayıtları.
+# info alanları çıktıya kopyalanarak eklenir; tablolardaki sözlükler değiştirilmemelidir.
+DifRecord = namedtuple("DifRecord", "hex extension_bit data_length value_kind info")
+VifRecord = namedtuple("VifRecord", "hex extension_bit unit multiplier date_kind info")
+VifeRecord = namedtuple("VifeRecord", "hex extension_bit info")
+
+
+def _make_dif_record(dif_byte):
+    info = parse_dif(dif_byte)
+    data_type = info["data_type"]
+    if "BCD" in data_type:
+        value_kind = "bcd"
+    elif "Real" in data_type:
+        value_kind = "real"
+    elif "Integer" in data_type:
+        value_kind = "integer"
+    else:
+        value_kind = None
+    return DifRecord(f"0x{dif_byte:02x}", info["extension_bit"], info["data_length"], value_kind, info)
+
+
+def _make_vif_record(vif_byte):
+    info = parse_vif(vif_byte)
+    if info["unit"] == "Tarih":
+        date_kind = "date"
+    elif info["unit"] == "Tarih ve Zaman":
+        date_kind = "datetime"
+    else:
+        date_kind = None
+    return VifRecord(f"0x{vif_byte:02x}", info["extension_bit"], info["unit"], info["multiplier"], date_kind, info)
+
+
+def _make_vife_record(vife_byte):
+    info = parse_vife(vife_byte)
+    return VifeRecord(f"0x{vife_byte:02x}", info["extension_bit"], info)
+
+
+DIF_TABLE = tuple(_make_dif_record(b) for b in range(256))
+DIFE_TABLE = tuple(parse_dife(b) for b in range(256))
+VIF_TABLE = tuple(_make_vif_record(b) for b in range(256))
+VIFE_TABLE = tuple(_make_vife_record(b) for b in range(256))
+
+
+def _decode_value(dif, vif, data_bytes):
+    """DIF/VIF kayıtlarına göre veri baytlarının değerini çözümle"""
+    value_kind = dif.value_kind
+    if value_kind == "bcd":
+        return decode_bcd(data_bytes, len(data_bytes))
+    elif value_kind == "real":
+        return decode_real(data_bytes)
+    elif vif.date_kind == "date":
+        return decode_date(data_bytes)
+    elif vif.date_kind == "datetime":
+        return decode_time(data_bytes)
+    elif value_kind == "integer":
+        return decode_integer(data_bytes, len(data_bytes))
+    return None
+
+
+def _format_value(vif, value):
+    """Çözümlenmiş değeri birimiyle birlikte metne dönüştür"""
+    if value is None:
+        return "Bilinmeyen format"
+    if vif.date_kind:
+        return str(value)
+    return f"{value * vif.multiplier} {vif.unit}"
+
+
+_NOT_DECODED = object()
+
+
+class DataBlock:
+    """
+    Tek bir DIF/VIF veri bloğunun kompakt gösterimi.
+    
+    DIF/VIF baytları tamsayı, DIFE/VIFE baytları bytes olarak tutulur; veri
+    kısmı çözümlenen payload içinde başlangıç/bitiş konumu olarak saklanır.
+    Değer ilk erişimde çözümlenir. Eski sözlük biçimi için to_dict() kullanılır.
+    """
+    __slots__ = ("dif", "dife", "vif", "vife", "storage_number", "_payload", "_start", "_end", "_value")
+
+    def __init__(self, dif, dife, vif, vife, storage_number, payload, start, end):
+        self.dif = dif
+        self.dife = dife
+        self.vif = vif
+        self.vife = vife
+        self.storage_number = storage_number
+        self._payload = payload
+        self._start = start
+        self._end = end
+        self._value = _NOT_DECODED
+
+    def __repr__(self):
+        return f"DataBlock(dif=0x{self.dif:02x}, vif=0x{self.vif:02x}, data={self.raw_data.hex()})"
+
+    @property
+    def data(self):
+        """Veri baytları (kopyasız memoryview)"""
+        return memoryview(self._payload)[self._start:self._end]
+
+    @property
+    def raw_data(self):
+        """Veri baytları (bytes)"""
+        return self._payload[self._start:self._end]
+
+    @property
+    def value(self):
+        """Çözümlenmiş (ölçeklenmemiş) değer"""
+        value = self._value
+        if value is _NOT_DECODED:
+            value = self._value = _decode_value(DIF_TABLE[self.dif], VIF_TABLE[self.vif], self.raw_data)
+        return value
+
+    @property
+    def formatted_value(self):
+        """Birim ve çarpan uygulanmış değer metni"""
+        return _format_value(VIF_TABLE[self.vif], self.value)
+
+    def to_dict(self, hex_output=True):
+        """Bloğu eski sözlük biçimine dönüştür (find_block kullanıcıları ve JSON çıktısı için)"""
+        dif = DIF_TABLE[self.dif]
+        dif_info = dict(dif.info)
+        dif_info["storage_number"] = self.storage_number
+        if self.dife:
+            dif_info["extension_bit"] = self.dife[-1] >> 7
+        block = {"dif": {"byte": dif.hex, "info": dif_info}}
+        if self.dife:
+            block["dife"] = [dict(DIFE_TABLE[b]) for b in self.dife]
+        
+        vif = VIF_TABLE[self.vif]
+        vif_info = dict(vif.info)
+        if self.vife:
+            vif_info["extension_bit"] = self.vife[-1] >> 7
+        block["vif"] = {"byte": vif.hex, "info": vif_info}
+        if self.vife:
+            block["vife"] = [{"byte": VIFE_TABLE[b].hex, "info": dict(VIFE_TABLE[b].info)} for b in self.vife]
+        
+        data_bytes = self.raw_data
+        block["raw_data"] = data_bytes.hex() if hex_output else data_bytes
+        block["value"] = self.value
+        block["formatted_value"] = self.formatted_value
+        return block
+
+
+def _decode_none(data_bytes):
+    return None
+
+
+def _decode_int_le(data_bytes):
+    return int.from_bytes(data_bytes, "little")
+
+
+def _compile_decoder(dif, vif, length):
+    """_decode_value ile aynı sonucu veren, uzunluğu sabitlenmiş çözücü fonksiyonu döndür"""
+    value_kind = dif.value_kind
+    if value_kind == "bcd":
+        return partial(decode_bcd, length=length)
+    elif value_kind == "real":
+        return decode_real
+    elif vif.date_kind == "date":
+        return decode_date
+    elif vif.date_kind == "datetime":
+        return decode_time
+    elif value_kind == "integer" and length in (1, 2, 3, 4, 6, 8):
+        return _decode_int_le
+    return _decode_none
+
+
+class CompiledFormat:
+    """
+    Bir sayacın DIF/VIF kayıt düzeninin derlenmiş hali.
+    
+    Aynı düzendeki sonraki telgraflar bloklar tek tek yürünmeden, sabit
+    konumlardan dilimlenerek çözümlenir. Düzenin uyup uymadığı, veri dışındaki
+    tüm baytları (DIF, DIFE, VIF, VIFE, LVAR ve artık baytlar) tek bir tamsayı
+    maskesiyle karşılaştırarak kontrol edilir.
+    """
+    __slots__ = ("format_bytes", "signature", "length", "mask", "expected", "fields", "extractors",
+                 "compact_fields", "compact_length")
+
+    def __init__(self, payload, blocks):
+        self.length = len(payload)
+        
+        mask = bytearray(b"\xff" * self.length)
+        format_bytes = bytearray()
+        fields = []
+        extractors = []
+        compact_fields = []
+        compact_pos = 0
+        has_variable_length = False
+        for block in blocks:
+            start, end = block._start, block._end
+            dif = DIF_TABLE[block.dif]
+            vif = VIF_TABLE[block.vif]
+            mask[start:end] = bytes(end - start)
+            format_bytes.append(block.dif)
+            format_bytes += block.dife
+            format_bytes.append(block.vif)
+            format_bytes += block.vife
+            if dif.data_length == -1:
+                has_variable_length = True
+            
+            fields.append((start, end, block.dif, block.dife, block.vif, block.vife, block.storage_number))
+            multiplier = None if vif.date_kind else vif.multiplier
+            extractors.append((start, end - start, _compile_decoder(dif, vif, end - start), multiplier))
+            compact_fields.append((compact_pos, compact_pos + end - start, block.dif, block.dife, block.vif,
+                                   block.vife, block.storage_number))
+            compact_pos += end - start
+        
+        self.mask = int.from_bytes(mask, "big")
+        self.expected = int.from_bytes(payload, "big") & self.mask
+        self.format_bytes = bytes(format_bytes)
+        # Değişken uzunluklu kayıtlar kompakt telgrafta gönderilemez
+        self.signature = None if has_variable_length else crc16_en13757(self.format_bytes)
+        self.fields = tuple(fields)
+        self.extractors = tuple(extractors)
+        self.compact_fields = tuple(compact_fields)
+        # Kompakt telgrafta yalnızca veri baytları bulunur
+        self.compact_length = compact_pos
+
+    def matches(self, payload):
+        """Payload bu düzene uyuyor mu? (veri baytları hariç tüm baytlar aynı olmalı)"""
+        return len(payload) == self.length and int.from_bytes(payload, "big") & self.mask == self.expected
+
+    def blocks(self, payload):
+        """Uyan bir payload için DataBlock listesini yürümeden oluştur"""
+        return [DataBlock(dif, dife, vif, vife, storage_number, payload, start, end)
+                for start, end, dif, dife, vif, vife, storage_number in self.fields]
+
+    def compact_blocks(self, data):
+        """Kompakt telgrafın (CI 0x79) yalnızca veri içeren kısmı için DataBlock listesi oluştur"""
+        return [DataBlock(dif, dife, vif, vife, storage_number, data, start, end)
+                for start, end, dif, dife, vif, vife, storage_number in self.compact_fields]
+
+    def values(self, payload):
+        """Her alanın çarpanı uygulanmış değerini sırayla döndür (tarih alanları metin olarak)"""
+        values = []
+        for offset, length, decoder, multiplier in self.extractors:
+            value = decoder(payload[offset:offset + length])
+            if value is not None and multiplier is not None:
+                value = value * multiplier
+            values.append(value)
+        return values
+
+
+class FormatCache:
+    """
+    Sayaç başına derlenmiş kayıt düzenlerini tutan LRU önbellek.
+    
+    Düzenler iki şekilde bulunur: sayaç başlığına göre (üretici, adres,
+    versiyon, tip) ve EN 13757 format imzasına göre. İmza araması, yalnızca
+    veri baytlarını taşıyan kompakt telgrafları (CI 0x79) çözmek için gereklidir;
+    bunun için aynı sayaçtan önce tam bir telgraf görülmüş olmalıdır.
+    LRU güncellemeleri ve isabet sayaçları bir kilitle korunur (şifre çözme
+    thread havuzu ile paylaşılabilir).
+    """
+
+    def __init__(self, max_meters=4096, max_signatures=1024):
+        self.max_meters = max_meters
+        self.max_signatures = max_signatures
+        self._by_meter = OrderedDict()
+        self._by_signature = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._by_meter)
+
+    def lookup(self, meter_key, payload):
+        """Sayacın bilinen düzeni bu payload'a uyuyorsa döndür"""
+        compiled = self._by_meter.get(meter_key)
+        if compiled is not None and compiled.matches(payload):
+            with self._lock:
+                if meter_key in self._by_meter:
+                    self._by_meter.move_to_end(meter_key)
+                self.hits += 1
+            return compiled
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get_by_signature(self, signature):
+        """Format imzasına göre derlenmiş düzeni döndür (yoksa None)"""
+        compiled = self._by_signature.get(signature)
+        if compiled is not None:
+            with self._lock:
+                if signature in self._by_signature:
+                    self._by_signature.move_to_end(signature)
+        return compiled
+
+    def learn(self, meter_key, payload, blocks):
+        """Yürüyerek çözümlenmiş bir payload'dan düzeni derle ve önbelleğe ekle"""
+        if not blocks:
+            return None
+        compiled = CompiledFormat(payload, blocks)
+        with self._lock:
+            self._by_meter[meter_key] = compiled
+            self._by_meter.move_to_end(meter_key)
+            if len(self._by_meter) > self.max_meters:
+                self._by_meter.popitem(last=False)
+            
+            if compiled.signature is not None:
+                self._by_signature[compiled.signature] = compiled
+                self._by_signature.move_to_end(compiled.signature)
+                if len(self._by_signature) > self.max_signatures:
+                    self._by_signature.popitem(last=False)
+        return compiled
+
+    def clear(self):
+        with self._lock:
+            self._by_meter.clear()
+            self._by_signature.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "meters": len(self._by_meter),
+                "signatures": len(self._by_signature),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# Varsayılan, süreç genelinde paylaşılan format önbelleği
+FORMAT_CACHE = FormatCache()
+
+
+def _readonly_bytes(data):
+    return data if isinstance(data, bytes) else bytes(data)
+
+
+class TelegramResult(dict):
+    """
+    Telgraf çözümleme sonucu sözlüğü.
+    
+    Sözlüğün yanında çözülmüş (düz) payload'ı salt okunur bytes olarak
+    taşır (payload özniteliği); cihaz sürücüleri raw_payload hex metnini
+    yeniden çözmek yerine bunu kullanır. JSON çıktısına eklenmez.
+    """
+    __slots__ = ("payload",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.payload = None
+
+    def __getstate__(self):
+        return {"payload": self.payload}
+
+    def __setstate__(self, state):
+        self.payload = state.get("payload")
+
+    def __reduce__(self):
+        # Sonuçlar multiprocessing kuyruklarından geçebilsin diye payload
+        # özniteliği sözlük içeriğiyle birlikte pickle edilir
+        state = self.__getstate__()
+        return self.__class__, (), state, None, iter(dict.items(self))
+
+
+class LazyTelegramResult(TelegramResult):
+    """
+    Veri bloklarını ilk erişimde çözümleyen sonuç sözlüğü.
+    
+    telegram_info ve raw_payload hemen doldurulur; "data_blocks" anahtarı
+    okunduğunda (result["data_blocks"], get, items, repr, ==, json.dumps ...)
+    bloklar bir kez çözümlenip sözlüğe yazılır. in ve len ertelenmiş anahtarı
+    çözümlemeden sayar. Pickle edilmeden önce bloklar çözümlenir; sonuç düz
+    sözlük gibi başka bir sürece gönderilebilir.
+    """
+    __slots__ = ("_block_decoder",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._block_decoder = None
+
+    def defer_data_blocks(self, decoder):
+        """data_blocks çözümlemesini ilk erişime ertele"""
+        dict.pop(self, "data_blocks", None)
+        self._block_decoder = decoder
+
+    @property
+    def blocks_decoded(self):
+        return self._block_decoder is None
+
+    def materialize(self):
+        """Ertelenmiş veri bloklarını çözümle ve sözlüğün kendisini döndür"""
+        decoder = self._block_decoder
+        if decoder is not None:
+            self._block_decoder = None
+            dict.__setitem__(self, "data_blocks", decoder())
+        return self
+
+    def __getstate__(self):
+        self.materialize()
+        return super().__getstate__()
+
+    def __setitem__(self, key, value):
+        if key == "data_blocks":
+            # Elle yazılan bloklar ertelenmiş çözümlemenin yerine geçer
+            self._block_decoder = None
+        dict.__setitem__(self, key, value)
+
+    def __len__(self):
+        return dict.__len__(self) + (self._block_decoder is not None)
+
+    def __repr__(self):
+        return dict.__repr__(self.materialize())
+
+    def __eq__(self, other):
+        if isinstance(other, LazyTelegramResult):
+            other.materialize()
+        return dict.__eq__(self.materialize(), other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __missing__(self, key):
+        if key == "data_blocks" and self._block_decoder is not None:
+            return dict.__getitem__(self.materialize(), key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key == "data_blocks" and self._block_decoder is not None:
+            return True
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        if key == "data_blocks":
+            self.materialize()
+        return dict.get(self, key, default)
+
+    def __iter__(self):
+        return dict.__iter__(self.materialize())
+
+    def keys(self):
+        return dict.keys(self.materialize())
+
+    def values(self):
+        return dict.values(self.materialize())
+
+    def items(self):
+        return dict.items(self.materialize())
+
+    def copy(self):
+        return dict(self.materialize())
+
+
+# DLL başlığı: L, C, M (2 bayt), A (4 bayt, little endian), versiyon, tip
+DLL_HEADER = struct.Struct("<BBHIBB")
+
+
+class TelegramPrefilter:
+    """
+    Yalnızca 10 baytlık DLL başlığına bakarak istenmeyen telgrafları eleyen filtre.
+    
+    Çevredeki sayaçların telgrafları AES şifre çözme, blok çözümleme ve sürücü
+    aramasından önce atılır. Başlık struct.unpack_from ile kopyalanmadan okunur;
+    adres 4 baytlık little endian tamsayı olarak karşılaştırılır.
+    
+    addresses: İzin verilen sayaç adresleri (ör. "31138762"); None ise hepsi
+    manufacturers: İzin verilen üretici kodları (0x4493, "0x4493" veya "QDS"); None ise hepsi
+    """
+
+    def __init__(self, addresses=None, manufacturers=None):
+        self.addresses = None
+        self.manufacturers = None
+        if addresses is not None:
+            self.set_addresses(addresses)
+        if manufacturers is not None:
+            self.set_manufacturers(manufacturers)
+        self.reset_counters()
+
+    def set_addresses(self, addresses):
+        """İzin verilen adres kümesini değiştir"""
+        self.addresses = frozenset(int(str(address).strip(), 16) for address in addresses if str(address).strip())
+
+    def set_manufacturers(self, manufacturers):
+        """İzin verilen üretici kümesini değiştir"""
+        codes = set()
+        for manufacturer in manufacturers:
+            if isinstance(manufacturer, int):
+                codes.add(manufacturer)
+            elif len(manufacturer) == 3 and manufacturer.isalpha():
+                codes.add(parse_manufacturer_code(manufacturer.upper()))
+            else:
+                codes.add(int(manufacturer, 16))
+        self.manufacturers = frozenset(codes)
+
+    def reset_counters(self):
+        self.accepted = 0
+        self.dropped = 0
+        self.dropped_short = 0
+        self.dropped_address = 0
+        self.dropped_manufacturer = 0
+
+    def accepts(self, frame):
+        """Telgraf filtreden geçiyor mu? (sayaçları günceller)"""
+        if len(frame) < 10:
+            self.dropped += 1
+            self.dropped_short += 1
+            return False
+        
+        _, _, m_field, address, _, _ = DLL_HEADER.unpack_from(frame)
+        if self.manufacturers is not None and m_field not in self.manufacturers:
+            self.dropped += 1
+            self.dropped_manufacturer += 1
+            return False
+        if self.addresses is not None and address not in self.addresses:
+            self.dropped += 1
+            self.dropped_address += 1
+            return False
+        
+        self.accepted += 1
+        return True
+
+    def filter(self, frames):
+        """Filtreden geçen telgrafları üret"""
+        accepts = self.accepts
+        for frame in frames:
+            if accepts(frame):
+                yield frame
+
+    def stats(self):
+        return {
+            "accepted": self.accepted,
+            "dropped": self.dropped,
+            "dropped_short": self.dropped_short,
+            "dropped_address": self.dropped_address,
+            "dropped_manufacturer": self.dropped_manufacturer
+        }
+
+
+class DuplicateFilter:
+    """
+    Tekrarlanan telgrafları bastıran, zaman pencereli ve sınırlı boyutlu önbellek.
+    
+    Sayaçlar aynı telgrafı birkaç kez gönderir; birden çok alıcı da aynı
+    telgrafı 3-5 kez iletebilir. Telgraf baytlarının özeti (BLAKE2b, 16 bayt)
+    ilk görülme zamanıyla saklanır; pencere içinde aynı özet tekrar gelirse
+    telgraf tekrar sayılır. Pencereyi aşan veya kapasiteyi taşan en eski
+    kayıtlar atılır.
+    
+    window: Saniye cinsinden tekrar penceresi
+    max_size: Saklanacak en fazla özet sayısı
+    """
+
+    def __init__(self, window=60.0, max_size=10000):
+        self.window = window
+        self.max_size = max_size
+        self._seen = OrderedDict()
+        self.unique = 0
+        self.duplicates = 0
+
+    def __len__(self):
+        return len(self._seen)
+
+    def is_duplicate(self, frame, now=None):
+        """Telgraf pencere içinde daha önce görüldü mü? (görülmediyse kaydeder)"""
+        if now is None:
+            now = time.monotonic()
+        digest = hashlib.blake2b(frame, digest_size=16).digest()
+        
+        seen = self._seen
+        first_seen = seen.get(digest)
+        if first_seen is not None and now - first_seen <= self.window:
+            self.duplicates += 1
+            return True
+        
+        # Süresi dolmuş ve kapasiteyi aşan en eski kayıtları at
+        seen.pop(digest, None)
+        while seen:
+            oldest_digest, oldest_time = next(iter(seen.items()))
+            if now - oldest_time <= self.window and len(seen) < self.max_size:
+                break
+            del seen[oldest_digest]
+        
+        seen[digest] = now
+        self.unique += 1
+        return False
+
+    def filter(self, frames):
+        """Tekrar olmayan telgrafları üret"""
+        is_duplicate = self.is_duplicate
+        for frame in frames:
+            if not is_duplicate(frame):
+                yield frame
+
+    def clear(self):
+        self._seen.clear()
+        self.unique = 0
+        self.duplicates = 0
+
+    def stats(self):
+        return {
+            "unique": self.unique,
+            "duplicates": self.duplicates,
+            "cached": len(self._seen)
+        }
+
+
+def parse_wmbus_telegram(hex_data, key=None, verbose=True, output_format="text", use_drivers=True, lazy=False,
+                         keys=None):
+    """
+    Tam bir wM-Bus telgrafını çözümle
+    
+    key verilmemişse ve keys (MeterKeyStore veya {adres: anahtar} sözlüğü)
+    verilmişse, anahtar telgrafın üretici ve adresine göre depodan bulunur.
+    
+    lazy=True verilirse DLL/TPL başlığı ve şifre çözme hemen yapılır, veri
+    blokları ise result["data_blocks"] ilk kez okunduğunda çözümlenir.
+    """
     try:
         data = binascii.unhexlify(hex_data)
     except binascii.Error as e:
         logger.error(f"Geçersiz hex string: {e}")
         return None
     
+    if key is None and keys is not None:
+        key, keys = _normalize_keys(keys)
+    else:
+        keys = None
+    
+    result = _parse_frame(data, key=key, keys=keys, verbose=verbose, output_format=output_format, lazy=lazy,
+                          format_cache=FORMAT_CACHE)
+    
+    if result is not None and output_format == "json":
+        return json.dumps(result, indent=2)
+    
+    return result
+
+
+# parse_many'de birlikte toplu şifre çözmeye giren telgraf sayısı
+DECRYPT_BATCH_SIZE = 256
+
+
+def parse_many(frames, keys=None, hex_output=False, compact=False, lazy=False, format_cache=FORMAT_CACHE,
+               prefilter=None, dedup=None, batch_size=DECRYPT_BATCH_SIZE):
+    """
+    Ham bayt telgraflarını toplu olarak çözümle (generator)
+    
+    Seri porttan / yakalama dosyalarından gelen telgraflar hex stringe
+    dönüştürülmeden doğrudan bayt olarak çözümlenir. Hex stringler yalnızca
+    hex_output=True verilirse üretilir; aksi halde "raw_payload" ve blokların
+    "raw_data" alanları bytes olarak döner.
+    
+    frames: bytes / bytearray / memoryview telgraflarından oluşan iterable
+    keys: Tüm telgraflar için tek bir AES anahtarı (hex string veya bytes),
+          sayaç adresine göre anahtar sözlüğü ({"31138762": "A1B2..."}) ya da
+          (üretici, adres) indeksli MeterKeyStore
+    hex_output: Ham veri alanları hex string olarak mı dönsün?
+    compact: data_blocks sözlük yerine DataBlock nesneleri olarak mı dönsün?
+             (büyük yakalamalarda bellek kullanımını azaltır)
+    lazy: Başlık ve şifre çözme hemen, veri blokları ilk erişimde çözümlensin mi?
+          (yalnızca telegram_info'ya bakıp yönlendirme yapan kullanıcılar için)
+    format_cache: Sayaç kayıt düzenlerinin önbelleği (None verilirse her telgraf yürünür)
+    prefilter: TelegramPrefilter; verilirse filtreye takılan telgraflar şifre
+               çözme ve çözümlemeye girmeden atlanır (sonuç üretilmez)
+    dedup: DuplicateFilter; verilirse pencere içinde tekrar gelen telgraflar
+           şifre çözme ve çözümlemeye girmeden atlanır (sonuç üretilmez)
+    batch_size: Anahtar verildiğinde telgraflar bu boyutta parçalar halinde
+                okunur; parçadaki mod 5 şifreli telgraflar anahtarlarına göre
+                gruplanıp tek seferde çözülür (bkz. decrypt_frames)
+    
+    Her telgraf için sırayla çözümleme sonucunu (dict) üretir; çözümlenemeyen
+    telgraflar için None üretilir.
+    """
+    key, key_map = _normalize_keys(keys)
+    
+    if prefilter is not None:
+        frames = prefilter.filter(frames)
+    if dedup is not None:
+        frames = dedup.filter(frames)
+    
+    if key is None and key_map is None:
+        for frame in frames:
+            if not isinstance(frame, bytes):
+                frame = bytes(frame)
+            yield _parse_frame(frame, verbose=False, hex_output=hex_output, compact=compact,
+                               lazy=lazy, format_cache=format_cache)
+        return
+    
+    chunk = []
+    for frame in frames:
+        chunk.append(frame if isinstance(frame, bytes) else bytes(frame))
+        if len(chunk) < batch_size:
+            continue
+        yield from _parse_batch(chunk, key, key_map, hex_output, compact, lazy, format_cache)
+        chunk = []
+    if chunk:
+        yield from _parse_batch(chunk, key, key_map, hex_output, compact, lazy, format_cache)
+
+
+def _parse_batch(chunk, key, key_map, hex_output, compact, lazy, format_cache):
+    for frame, predecrypted in zip(chunk, decrypt_frames(chunk, key, key_map)):
+        yield _parse_frame(frame, key=key, keys=key_map, verbose=False, hex_output=hex_output, compact=compact,
+                           lazy=lazy, format_cache=format_cache, predecrypted=predecrypted)
+
+
+def encryption_sample(frame):
+    """
+    Güvenlik modu 5 ile şifrelenmiş telgraftan şifre çözme için gerekenleri çıkar
+
+    Returns:
+        tuple or None: ((m_field, adres), iv, şifreli payload) veya telgraf
+                       mod 5 şifreli değilse None
+    """
+    if len(frame) < 15:
+        return None
+    _, _, m_field, address, _, _ = DLL_HEADER.unpack_from(frame)
+    ci_field = frame[10]
+    if ci_field == 0x72:
+        tpl = 11 + 8
+        payload_start = 11 + 12
+    elif ci_field == 0x7A:
+        tpl = 11
+        payload_start = 11 + 4
+    else:
+        return None
+    if len(frame) < payload_start + 16:
+        return None
+
+    access_number = frame[tpl]
+    cfg = frame[tpl + 2] | (frame[tpl + 3] << 8)
+    if (cfg >> 8) & 0x1F != 5:
+        return None
+
+    iv = build_iv(frame[2:8], access_number)
+    return (m_field, f"{address:08x}"), iv, frame[payload_start:]
+
+
+def decrypt_frames(frames, key=None, keys=None):
+    """
+    Telgraflardaki mod 5 şifreli payload'ları anahtarlarına göre gruplayıp toplu çöz
+    
+    Şifreli veriler AES_ENGINE.decrypt_batch ile aynı anahtar için tek ECB
+    çağrısında çözülür. Anahtarı bulunmayan, mod 5 olmayan veya uzunluğu 16'nın
+    katı olmayan telgraflar için None döner; bunlar _parse_frame'de tek tek
+    işlenir.
+    
+    frames: bytes telgraf listesi
+    key: Tüm telgraflar için tek anahtar (bytes)
+    keys: MeterKeyStore (key verilmemişse kullanılır)
+    
+    Returns:
+        list: Telgraf başına çözülmüş (dolgusu kaldırılmamış) payload
+              (memoryview) veya None
+    """
+    items = []
+    positions = []
+    for position, frame in enumerate(frames):
+        sample = encryption_sample(frame)
+        if sample is None:
+            continue
+        (m_field, address), iv, payload = sample
+        frame_key = key if key is not None else keys.lookup(m_field, address) if keys is not None else None
+        if frame_key is None or len(frame_key) != 16 or len(payload) % 16:
+            continue
+        items.append((frame_key, iv, payload))
+        positions.append(position)
+    
+    decrypted = [None] * len(frames)
+    if items:
+        for position, plain in zip(positions, AES_ENGINE.decrypt_batch(items)):
+            decrypted[position] = plain
+    return decrypted
+
+
+def _normalize_keys(keys):
+    """
+    parse_many keys argümanını (tek anahtar, key_map) çiftine dönüştür
+    
+    Tek anahtar verilmişse key_map None olur. Sözlük verilmişse anahtarlar bir
+    kez doğrulanıp MeterKeyStore'a yüklenir; MeterKeyStore olduğu gibi kullanılır.
+    """
+    if keys is None or isinstance(keys, (str, bytes, bytearray)):
+        return _key_to_bytes(keys), None
+    if isinstance(keys, MeterKeyStore):
+        return None, keys
+    return None, MeterKeyStore.from_mapping(keys)
+
+
+def _key_to_bytes(key):
+    """Hex string veya bytes AES anahtarını bytes'a dönüştür"""
+    if key is None or isinstance(key, bytes):
+        return key
+    if isinstance(key, str):
+        return binascii.unhexlify(key)
+    return bytes(key)
+
+
+def _parse_frame(data, key=None, keys=None, verbose=False, output_format="text", hex_output=True, compact=False,
+                 lazy=False, format_cache=None, predecrypted=None):
+    """
+    Bayt olarak verilmiş tek bir telgrafı çözümle
+    
+    key: AES anahtarı (hex string veya bytes)
+    keys: (Üretici, adres) indeksli MeterKeyStore (key verilmemişse kullanılır)
+    hex_output: raw_payload / raw_data alanları hex string mi, bytes mı olsun?
+    compact: data_blocks sözlük yerine DataBlock nesneleri olarak mı dönsün?
+    lazy: data_blocks ilk erişimde mi çözümlensin? (LazyTelegramResult döner)
+    format_cache: Kayıt düzenlerinin derlenip saklandığı FormatCache (None ise kullanılmaz)
+    predecrypted: decrypt_frames ile önceden çözülmüş mod 5 payload'ı (verilirse
+                  şifre burada yeniden çözülmez)
+    
+    Sonuç TelegramResult'tır; çözülmüş payload result.payload olarak bytes
+    halinde de taşınır (sürücüler için, hex_output'tan bağımsız).
+    """
     if len(data) < 10:
         logger.error(f"Telgraf çok kısa (en az 10 bayt olmalı): {len(data)} bayt")
         return None
     
-    result = {
+    result = (LazyTelegramResult if lazy else TelegramResult)({
         "telegram_info": {},
         "data_blocks": []
-    }
+    })
     
     # Temel DLL (Veri Bağlantı Katmanı) bilgilerini çıkar
     length = data[0]
@@ -133,9 +957,7 @@ def parse_wmbus_telegram(hex_data, key=None, verbose=True, output_format="text",
     
     # Sayaç adresi/ID'si - bayt sırasını ters çevir (little endian)
     address_bytes = data[4:8]
-    address_str = ""
-    for i in range(len(address_bytes)-1, -1, -1):
-        address_str += f"{address_bytes[i]:02x}"
+    address_str = address_bytes[::-1].hex()
     
     version = data[8]
     type = data[9]  # Medya/cihaz türü
@@ -177,12 +999,37 @@ def parse_wmbus_telegram(hex_data, key=None, verbose=True, output_format="text",
     # standart wM-Bus çözümlemesi yapılmayacak; ham veri driver_manager'a aktarılacak.
     if ci_field in (0xA1, 0xA2, 0xA3):
         logger.info(f"Özel CI alanı tespit edildi (0x{ci_field:02x}); standart wM-Bus çözümleme yapılmayacak")
-        result["raw_payload"] = binascii.hexlify(data[11:]).decode()
+        result.payload = _readonly_bytes(data[11:])
+        result["raw_payload"] = result.payload.hex() if hex_output else data[11:]
         return result
     
     # TPL güvenlik kontrolü (şifrelenmiş olabilir)
     is_encrypted = False
+    sec_mode = 0
     tpl_start = 11
+    meter_id = address_bytes
+    afl = None
+    
+    # AFL (Kimlik Doğrulama ve Parçalama Alt Katmanı): mod 7 telgraflarında
+    # mesaj sayacı ve MAC taşır, ardından asıl TPL CI alanı gelir
+    if ci_field == 0x90:
+        afl = _parse_afl(data, tpl_start - 1)
+        if afl is None:
+            logger.warning("AFL verisi çok kısa")
+            return result
+        result["telegram_info"]["afl"] = afl["info"]
+        if verbose and output_format == "text":
+            print(f"AFL: {afl['info']}")
+        
+        tpl_ci_offset = afl["end"]
+        if len(data) <= tpl_ci_offset:
+            logger.warning("AFL sonrası veri yok")
+            return result
+        ci_field = data[tpl_ci_offset]
+        tpl_start = tpl_ci_offset + 1
+        result["telegram_info"]["ci_field"] = f"0x{ci_field:02x}"
+        if verbose and output_format == "text":
+            print(f"TPL CI alanı: 0x{ci_field:02x}")
     
     # CI alanına göre TPL yapısını belirle
     if ci_field == 0x72:  # Uzun başlık
@@ -191,6 +1038,7 @@ def parse_wmbus_telegram(hex_data, key=None, verbose=True, output_format="text",
             return result
         
         tpl_id = data[tpl_start:tpl_start+4]
+        meter_id = tpl_id
         tpl_mfct = (data[tpl_start+5] << 8) | data[tpl_start+4]
         tpl_version = data[tpl_start+6]
         tpl_type = data[tpl_start+7]
@@ -236,7 +1084,8 @@ def parse_wmbus_telegram(hex_data, key=None, verbose=True, output_format="text",
             }
             if verbose and output_format == "text":
                 print("Telgraf AES-CBC (IV'siz) ile şifrelenmiş")
-            payload_start = tpl_start + 12
+            # Mod 7'de konfigürasyonu bir uzantı baytı (KDF seçimi) izler
+            payload_start = tpl_start + 13
         else:
             result["telegram_info"]["security"] = {
                 "mode": f"0x{sec_mode:02x}",
@@ -274,13 +1123,45 @@ def parse_wmbus_telegram(hex_data, key=None, verbose=True, output_format="text",
             }
             if verbose and output_format == "text":
                 print(f"Telgraf AES-CBC ile şifrelenmiş (mod {sec_mode})")
-            payload_start = tpl_start + 4
+            payload_start = tpl_start + 5 if sec_mode == 7 else tpl_start + 4
         else:
             result["telegram_info"]["security"] = {
                 "mode": f"0x{sec_mode:02x}",
                 "status": "Şifrelenmemiş"
             }
             payload_start = tpl_start + 4
+    elif ci_field == 0x79:  # Kompakt telgraf: format imzası + veri CRC'si + yalnızca veri
+        if len(data) < tpl_start + 4:
+            logger.warning("Kompakt telgraf başlığı çok kısa")
+            return result
+        
+        format_signature = data[tpl_start] | (data[tpl_start+1] << 8)
+        result["telegram_info"]["format_signature"] = f"0x{format_signature:04x}"
+        compiled = format_cache.get_by_signature(format_signature) if format_cache is not None else None
+        
+        compact_data = data[tpl_start+4:]
+        result.payload = _readonly_bytes(compact_data)
+        result["raw_payload"] = result.payload.hex() if hex_output else compact_data
+        if compiled is None:
+            logger.info(f"Kompakt telgraf atlandı: format imzası 0x{format_signature:04x} henüz bilinmiyor")
+            return result
+        
+        if len(compact_data) != compiled.compact_length:
+            logger.warning(f"Kompakt telgraf atlandı: veri uzunluğu {len(compact_data)}, "
+                           f"format imzası 0x{format_signature:04x} için beklenen {compiled.compact_length}")
+            return result
+        
+        data_crc = data[tpl_start+2] | (data[tpl_start+3] << 8)
+        result["telegram_info"]["data_crc"] = f"0x{data_crc:04x}"
+        calculated_crc = crc16_en13757(compact_data)
+        if calculated_crc != data_crc:
+            logger.warning(f"Kompakt telgraf atlandı: veri CRC'si hatalı "
+                           f"(telgraf 0x{data_crc:04x}, hesaplanan 0x{calculated_crc:04x})")
+            return result
+        
+        blocks = compiled.compact_blocks(compact_data)
+        result["data_blocks"] = blocks if compact else [block.to_dict(hex_output) for block in blocks]
+        return result
     else:
         payload_start = tpl_start
     
@@ -291,26 +1172,37 @@ def parse_wmbus_telegram(hex_data, key=None, verbose=True, output_format="text",
     payload = data[payload_start:]
     
     # Şifre çözme işlemi
+    if key is None and keys is not None:
+        key = keys.lookup(m_field, address_str)
+    
     if is_encrypted and key:
         try:
-            key_bytes = binascii.unhexlify(key)
+            key_bytes = _key_to_bytes(key)
             if len(key_bytes) != 16:
                 logger.error(f"Geçersiz anahtar uzunluğu: {len(key_bytes)} bayt (16 bayt olmalı)")
                 return result
             
-            if 'tpl' in result["telegram_info"] and 'access_number' in result["telegram_info"]["tpl"]:
-                iv = calculate_iv(
-                    m_field,
-                    address_bytes,
-                    result["telegram_info"]["tpl"]["access_number"]
-                )
+            if sec_mode == 7:
+                # Mod 7: AFL sayacından türetilen mesaj anahtarı, sıfır IV
+                decrypted = _decrypt_mode7(data, payload, key_bytes, afl, meter_id, tpl_start - 1,
+                                           tpl_cfg, data[payload_start - 1])
             else:
-                iv = None
-            
-            decrypted = decrypt_aes_cbc_iv(payload, key_bytes, iv)
+                if 'tpl' in result["telegram_info"] and 'access_number' in result["telegram_info"]["tpl"]:
+                    iv = build_iv(data[2:8], result["telegram_info"]["tpl"]["access_number"])
+                else:
+                    iv = None
+                
+                # Önce yalnızca ilk blok çözülüp 0x2F2F doğrulanır; yanlış anahtar
+                # tüm payload'ı çözmeden elenir
+                if predecrypted is not None and sec_mode == 5:
+                    decrypted = remove_padding(bytes(predecrypted))
+                elif AES_ENGINE.check_first_block(key_bytes, iv or bytes(16), payload):
+                    decrypted = decrypt_aes_cbc_iv(payload, key_bytes, iv)
+                else:
+                    decrypted = None
             
             decrypt_check_offset = 2
-            if len(decrypted) >= 2 and decrypted[0] == 0x2F and decrypted[1] == 0x2F:
+            if decrypted is not None and len(decrypted) >= 2 and decrypted[0] == 0x2F and decrypted[1] == 0x2F:
                 result["telegram_info"]["security"]["status"] = "Çözüldü"
                 if verbose and output_format == "text":
                     print("Şifre çözme başarılı! (0x2F2F kontrol baytları doğrulandı)")
@@ -325,128 +1217,198 @@ def parse_wmbus_telegram(hex_data, key=None, verbose=True, output_format="text",
             return result
     
     # Veri blokları (DIF/VIF yapısı) çözümlemesi
-    result["raw_payload"] = binascii.hexlify(payload).decode()
+    result.payload = _readonly_bytes(payload)
+    result["raw_payload"] = result.payload.hex() if hex_output else payload
     if verbose and output_format == "text":
         print("\nVeri blokları:")
     
+    meter_key = data[2:10]
+    if lazy and not verbose:
+        result.defer_data_blocks(partial(_parse_data_blocks, payload, hex_output=hex_output, compact=compact,
+                                         format_cache=format_cache, meter_key=meter_key))
+    else:
+        result["data_blocks"] = _parse_data_blocks(payload, verbose, output_format, hex_output, compact,
+                                                   format_cache, meter_key)
+    
+    return result
+
+
+# AFL MCL alanındaki kimlik doğrulama tipine göre MAC uzunluğu (EN 13757-7)
+AFL_MAC_LENGTHS = {3: 2, 4: 4, 5: 8, 6: 12, 7: 16, 8: 12}
+
+
+def _parse_afl(data, pos):
+    """
+    AFL başlığını çözümle (pos: 0x90 CI alanının konumu)
+    
+    Returns:
+        dict or None: {"info": telegram_info için sözlük, "mcl", "counter" (4 bayt
+                       veya None), "mac" (bytes veya None), "end": sonraki CI
+                       alanının konumu}; veri kısaysa None
+    """
+    if len(data) < pos + 4:
+        return None
+    afl_len = data[pos + 1]
+    end = pos + 2 + afl_len
+    if len(data) < end:
+        return None
+    
+    afl_fc = data[pos + 2] | (data[pos + 3] << 8)
+    field = pos + 4
+    afl = {"mcl": 0, "counter": None, "mac": None, "end": end}
+    info = {
+        "ci": f"0x{data[pos]:02x}",
+        "length": afl_len,
+        "fragment_control": f"0x{afl_fc:04x}"
+    }
+    
+    if afl_fc & 0x2000:  # Mesaj kontrol alanı (MCL)
+        afl["mcl"] = data[field]
+        info["message_control"] = f"0x{data[field]:02x}"
+        field += 1
+    if afl_fc & 0x0200:  # Anahtar bilgisi
+        info["key_info"] = f"0x{data[field] | (data[field + 1] << 8):04x}"
+        field += 2
+    if afl_fc & 0x0800:  # Mesaj sayacı
+        afl["counter"] = data[field:field + 4]
+        info["counter"] = int.from_bytes(afl["counter"], "little")
+        field += 4
+    if afl_fc & 0x0400:  # MAC
+        mac_length = AFL_MAC_LENGTHS.get(afl["mcl"] & 0x0F)
+        if mac_length is None:
+            logger.warning(f"AFL MAC uzunluğu bilinmiyor (MCL 0x{afl['mcl']:02x})")
+        else:
+            afl["mac"] = data[field:field + mac_length]
+            info["mac"] = afl["mac"].hex()
+            field += mac_length
+    
+    if field > end:
+        return None
+    afl["info"] = info
+    return afl
+
+
+def _decrypt_mode7(data, payload, key, afl, meter_id, tpl_ci_offset, tpl_cfg, cfg_ext):
+    """
+    Güvenlik modu 7 (AES-CBC, IV'siz) payload'ını çöz
+    
+    Mesaj anahtarları ana anahtar, AFL mesaj sayacı ve sayaç ID'sinden AES-CMAC
+    ile türetilir (AES_ENGINE içinde önbelleklenir). AFL MAC'i varsa şifre
+    çözmeden önce doğrulanır.
+    
+    Returns:
+        bytes or None: Çözülmüş payload (şifrelenmemiş kuyruk dahil), anahtar
+                       türetilemezse veya doğrulama başarısızsa None
+    """
+    if afl is None or afl["counter"] is None:
+        logger.warning("Mod 7 telgrafında AFL mesaj sayacı yok, anahtar türetilemiyor")
+        return None
+    
+    kdf_selection = (cfg_ext >> 4) & 0x03
+    if kdf_selection != 1:
+        logger.warning(f"Desteklenmeyen mod 7 KDF seçimi: {kdf_selection}")
+        return None
+    
+    enc_key, mac_key = AES_ENGINE.derive_keys(key, afl["counter"], meter_id)
+    
+    if afl["mac"] is not None:
+        message = bytes([afl["mcl"]]) + afl["counter"] + data[tpl_ci_offset:]
+        if not verify_cmac(mac_key, message, afl["mac"]):
+            logger.info("Mod 7 AFL MAC doğrulanamadı (yanlış anahtar?)")
+            return None
+    
+    # Şifreli blok sayısı konfigürasyonda; 0 ise tüm payload şifrelidir
+    encrypted_length = ((tpl_cfg >> 4) & 0x0F) * 16 or len(payload) - len(payload) % 16
+    if encrypted_length > len(payload) or encrypted_length == 0:
+        logger.warning("Mod 7 şifreli blok sayısı payload uzunluğuyla uyuşmuyor")
+        return None
+    
+    decrypted = AES_ENGINE.decrypt_cbc(enc_key, bytes(16), payload[:encrypted_length], cache=False)
+    return decrypted + payload[encrypted_length:]
+
+
+def _parse_data_blocks(payload, verbose=False, output_format="text", hex_output=True, compact=False,
+                       format_cache=None, meter_key=None):
+    """
+    Şifresi çözülmüş payload içindeki DIF/VIF veri bloklarını çözümle
+    
+    format_cache verilmişse ve sayacın bilinen düzeni payload'a uyuyorsa bloklar
+    sabit konumlardan oluşturulur; aksi halde bloklar yürünür ve düzen öğrenilir.
+    """
+    if format_cache is not None and not verbose:
+        compiled = format_cache.lookup(meter_key, payload)
+        if compiled is not None:
+            blocks = compiled.blocks(payload)
+            return blocks if compact else [block.to_dict(hex_output) for block in blocks]
+    
+    blocks = []
     pos = 0
-    while pos < len(payload):
-        if pos + 1 >= len(payload):
+    payload_len = len(payload)
+    while pos < payload_len:
+        if pos + 1 >= payload_len:
             break
         
-        data_block = {}
         dif_byte = payload[pos]
-        dif_info = parse_dif(dif_byte)
-        data_block["dif"] = {
-            "byte": f"0x{dif_byte:02x}",
-            "info": dif_info
-        }
+        dif = DIF_TABLE[dif_byte]
+        storage_number = dif.info["storage_number"]
         pos += 1
         
         # DIF uzantıları (DIFE)
-        dife_list = []
-        while dif_info["extension_bit"] and pos < len(payload):
+        dife_start = pos
+        extension_bit = dif.extension_bit
+        while extension_bit and pos < payload_len:
             dife_byte = payload[pos]
-            dife_info = {
-                "byte": f"0x{dife_byte:02x}",
-                "storage_number_bit": (dife_byte & 0x40) >> 6,
-                "tariff_bit": (dife_byte & 0x30) >> 4,
-                "device_unit_bit": dife_byte & 0x0F,
-                "extension_bit": (dife_byte & 0x80) >> 7
-            }
-            dife_list.append(dife_info)
-            dif_info["storage_number"] |= ((dife_byte & 0x40) >> 6) << (pos - 1)
-            dif_info["extension_bit"] = (dife_byte & 0x80) >> 7
+            storage_number |= ((dife_byte & 0x40) >> 6) << (pos - 1)
+            extension_bit = dife_byte >> 7
             pos += 1
-            if not dif_info["extension_bit"]:
-                break
-        
-        if dife_list:
-            data_block["dife"] = dife_list
+        dife = payload[dife_start:pos]
         
         # VIF
-        if pos >= len(payload):
+        if pos >= payload_len:
             break
         vif_byte = payload[pos]
-        vif_info = parse_vif(vif_byte)
-        data_block["vif"] = {
-            "byte": f"0x{vif_byte:02x}",
-            "info": vif_info
-        }
+        vif = VIF_TABLE[vif_byte]
         pos += 1
         
         # VIFE (VIF uzantıları)
-        vife_list = []
-        while vif_info["extension_bit"] and pos < len(payload):
-            vife_byte = payload[pos]
-            vife_info = parse_vife(vife_byte)
-            vife_list.append({
-                "byte": f"0x{vife_byte:02x}",
-                "info": vife_info
-            })
-            vif_info["extension_bit"] = vife_info["extension_bit"]
+        vife_start = pos
+        extension_bit = vif.extension_bit
+        while extension_bit and pos < payload_len:
+            extension_bit = payload[pos] >> 7
             pos += 1
-            if not vife_info["extension_bit"]:
-                break
-        if vife_list:
-            data_block["vife"] = vife_list
+        vife = payload[vife_start:pos]
         
         # Veri uzunluğu
-        data_length = dif_info["data_length"]
+        data_length = dif.data_length
         if data_length == -1:
-            if pos >= len(payload):
+            if pos >= payload_len:
                 break
             data_length = payload[pos]
             pos += 1
         
-        if pos + data_length > len(payload):
-            logger.warning(f"Uyarı: Veri bloğu tamamlanmadan veri bitti. İhtiyaç: {data_length}, Kalan: {len(payload) - pos}")
+        if pos + data_length > payload_len:
+            logger.warning(f"Uyarı: Veri bloğu tamamlanmadan veri bitti. İhtiyaç: {data_length}, Kalan: {payload_len - pos}")
             break
         
-        data_bytes = payload[pos:pos+data_length]
-        data_block["raw_data"] = binascii.hexlify(data_bytes).decode()
+        block = DataBlock(dif_byte, dife, vif_byte, vife, storage_number, payload, pos, pos + data_length)
         pos += data_length
         
-        # Veri çözümlemesi
-        value = None
-        if "BCD" in dif_info["data_type"]:
-            value = decode_bcd(data_bytes, data_length)
-        elif "Real" in dif_info["data_type"]:
-            value = decode_real(data_bytes)
-        elif vif_info["unit"] == "Tarih":
-            value = decode_date(data_bytes)
-        elif vif_info["unit"] == "Tarih ve Zaman":
-            value = decode_time(data_bytes)
-        elif "Integer" in dif_info["data_type"]:
-            value = decode_integer(data_bytes, data_length)
-        
-        formatted_value = "Bilinmeyen format"
-        if value is not None:
-            if vif_info["unit"] in ["Tarih", "Tarih ve Zaman"]:
-                formatted_value = str(value)
-            else:
-                scaled_value = value * vif_info["multiplier"]
-                formatted_value = f"{scaled_value} {vif_info['unit']}"
-        
-        data_block["value"] = value
-        data_block["formatted_value"] = formatted_value
-        
         if verbose and output_format == "text":
-            print(f"DIF: 0x{dif_byte:02x} ({dif_info['data_type']}, {dif_info['function_type']})")
-            print(f"VIF: 0x{vif_byte:02x} (Birim: {vif_info['unit']}, Çarpan: {vif_info['multiplier']})")
-            if vife_list:
-                vife_str = ', '.join([f"0x{v['byte']}" for v in vife_list])
+            print(f"DIF: 0x{dif_byte:02x} ({dif.info['data_type']}, {dif.info['function_type']})")
+            print(f"VIF: 0x{vif_byte:02x} (Birim: {vif.unit}, Çarpan: {vif.multiplier})")
+            if vife:
+                vife_str = ', '.join([f"0x{VIFE_TABLE[b].hex}" for b in vife])
                 print(f"VIFE: {vife_str}")
-            print(f"Veri: {binascii.hexlify(data_bytes).decode()}")
-            print(f"Değer: {formatted_value}")
+            print(f"Veri: {block.raw_data.hex()}")
+            print(f"Değer: {block.formatted_value}")
             print("-" * 40)
         
-        result["data_blocks"].append(data_block)
+        blocks.append(block)
     
-    if output_format == "json":
-        return json.dumps(result, indent=2)
+    if format_cache is not None:
+        format_cache.learn(meter_key, payload, blocks)
     
-    return result
+    return blocks if compact else [block.to_dict(hex_output) for block in blocks]
 
 
 def create_telegram(manufacturer, id_bytes, device_type, ci=0x72, payload=None, encrypted=False, key=None):
@@ -536,12 +1498,8 @@ def create_telegram(manufacturer, id_bytes, device_type, ci=0x72, payload=None,
             # 2F2F başlangıç kontrol baytlarını ekle
             payload_with_header = b'\x2F\x2F' + payload_bytes
             
-            # AES-CBC Şifreleme
-            cipher = AES.new(key_bytes, AES.MODE_CBC, iv)
-            # 16 baytın katlarına tamamla (PKCS#7 padding)
-            padding_len = 16 - (len(payload_with_header) % 16)
-            padded_payload = payload_with_header + bytes([padding_len] * padding_len)
-            encrypted_payload = cipher.encrypt(padded_payload)
+            # AES-CBC Şifreleme (PKCS#7 dolgusu ile)
+            encrypted_payload = encrypt_aes_cbc_iv(payload_with_header, key_bytes, iv)
             
             telegram.extend(encrypted_payload)
         else:
@@ -565,6 +1523,9 @@ def print_help():
     print("  -v, --verbose          Detaylı çıktı")
     print("  -c, --create           Telgraf oluştur (örnekler için README'ye bakın)")
     print("  -d, --drivers          Cihaz sürücülerini kullan (varsayılan: Evet)")
+    print("  -f, --file DOSYA       Yakalama dosyasını çözümle (her satırda bir hex telgraf)")
+    print("  -j, --jobs N           Yakalama dosyası için paralel işçi süreç sayısı (0: CPU sayısı)")
+    print("  -K, --keys DOSYA       Sayaç anahtar dosyası (.syc, .xlsx veya .csv)")
     print("")
     print("Örnek:")
     print("  python wmbus_parser.py 314493446287133136087a250000200B6e1500004B6e000000426cffffcB086e000000c2086cdf2c326cffff046d3712f221")
@@ -580,9 +1541,17 @@ def main():
     parser.add_argument("-v", "--verbose", action="store_true", help="Detaylı çıktı")
     parser.add_argument("-c", "--create", action="store_true", help="Telgraf oluştur")
     parser.add_argument("-d", "--drivers", action="store_true", default=True, help="Cihaz sürücülerini kullan (varsayılan: Evet)")
+    parser.add_argument("-f", "--file", help="Yakalama dosyası (her satırda bir hex telgraf)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Yakalama dosyası için paralel işçi süreç sayısı (0: CPU sayısı)")
+    parser.add_argument("-K", "--keys", help="Sayaç anahtar dosyası (.syc, .xlsx veya .csv)")
     
     args = parser.parse_args()
     
+    key_store = None
+    if args.keys:
+        key_store = MeterKeyStore()
+        key_store.load(args.keys)
+    
     if args.create:
         # Örnek telgraf oluştur
         mfct = 0x0477  # Kamstrup
@@ -605,6 +1574,28 @@ def main():
         
         print(f"Oluşturulan telgraf: {telegram}")
     
+    elif args.file:
+        # Yakalama dosyasını (paralel) çözümle
+        from wmbus_parallel import parse_parallel, read_capture_file
+        
+        results = parse_parallel(
+            read_capture_file(args.file),
+            jobs=args.jobs or None,
+            keys=args.key or key_store,
+            use_drivers=DRIVERS_AVAILABLE and args.drivers
+        )
+        for index, result in results:
+            if args.output == "json":
+                print(json.dumps({"index": index, "result": result}, ensure_ascii=False))
+            elif result is None:
+                print(f"{index}: çözümlenemedi")
+            else:
+                info = result.get("telegram_info", {})
+                summary = ", ".join(f"{k}={result[k]}" for k in
+                                    ["meter", "total_kwh", "current_kwh", "current_hca", "total_m3", "volume"]
+                                    if k in result)
+                print(f"{index}: {info.get('address', '')} {info.get('manufacturer', '')} {summary}")
+    
     elif args.telegram:
        
         # Telgrafı çözümle
@@ -613,7 +1604,8 @@ def main():
             key=args.key,
             verbose=args.verbose,
             output_format=args.output,
-            use_drivers=False  # Önce sürücüsüz çözümleyelim
+            use_drivers=False,  # Önce sürücüsüz çözümleyelim
+            keys=key_store
         )
 
         print(f"Debug: Telegram yapısı: {type(result)}")
@@ -665,4 +1657,7 @@ def main():
         print_help()
 
 if __name__ == "__main__":
+    # --jobs süreç havuzu kullanır; Windows'ta donmuş exe'nin başlattığı işçi
+    # süreçler main()'i yeniden çalıştırmadan havuz işçisi olarak devam etmeli
+    multiprocessing.freeze_support()
     main()
@@ -1,4 +1,13 @@
 # -*- mode: python ; coding: utf-8 -*-
+import sys
+sys.path.insert(0, SPECPATH)
+
+# Statik sürücü kaydını üret; donmuş uygulamada sürücü dizini taranamaz.
+# Modül listesi generate_registry'nin dönüş değerinden alınır: driver_manager
+# içe aktarılırken eski driver_registry zaten yüklenmiş olur.
+from driver_manager import generate_registry
+DRIVER_MODULES = generate_registry()
+
 
 
 a = Analysis(
@@ -6,7 +15,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=['driver_registry'] + DRIVER_MODULES,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
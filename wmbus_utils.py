@@ -8,7 +8,9 @@ Bu modül, wM-Bus telgrafları işlemek için gerekli yardımcı işlevleri içe
 import binascii
 import struct
 from datetime import datetime
-from Crypto.Cipher import AES
+# AES işlemleri tek motor üzerinden (wmbus_crypto) yapılır; eski içe aktarmalar
+# için burada yeniden dışa aktarılır
+from wmbus_crypto import decrypt_aes_cbc_iv, encrypt_aes_cbc_iv
 
 def decode_integer(data, length):
     """İnteger verilerini çözümle"""
@@ -82,6 +84,28 @@ def decode_time(data):
     except ValueError:
         return f"{day:02d}/{month:02d}/{year} {hour:02d}:{minute:02d}"
 
+def crc16_en13757(data):
+    """
+    EN 13757 CRC-16 hesapla (polinom 0x3D65, sonuç ters çevrilir)
+    
+    Kompakt telgraflardaki (CI 0x79) format imzası DIF/VIF baytları, veri
+    CRC'si ise veri baytları üzerinden bu CRC ile hesaplanır.
+    """
+    crc = 0x0000
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x3D65) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+    return crc ^ 0xFFFF
+
+# IV düzeni: M alanı (2) | sayaç ID'si (4) | erişim numarası | çerçeve sayısı (2) | 7 sıfır bayt
+IV_FIELDS = struct.Struct("<H4sBH7x")
+# M ve A alanları telgrafta IV'deki sırayla durduğu için başlık dilimi doğrudan kullanılabilir
+IV_LAYOUT = struct.Struct("<6sBH7x")
+
 def calculate_iv(manufacturer, id_bytes, access_nr, frame_count=0):
     """
     AES-CBC için IV (Initialization Vector) hesapla
@@ -92,54 +116,18 @@ def calculate_iv(manufacturer, id_bytes, access_nr, frame_count=0):
     frame_count: 2 byte çerçeve sayısı (opsiyonel)
     """
     iv = bytearray(16)
-    
-    # Üretici kodunu ters çevir (little endian)
-    iv[0] = manufacturer & 0xFF
-    iv[1] = (manufacturer >> 8) & 0xFF
-    
-    # Sayaç ID'si
-    for i in range(min(4, len(id_bytes))):
-        iv[2+i] = id_bytes[i]
-    
-    # Erişim numarası
-    iv[6] = access_nr
-    
-    # Çerçeve sayısı
-    iv[7] = frame_count & 0xFF
-    iv[8] = (frame_count >> 8) & 0xFF
-    
-    # Geri kalan kısım
-    for i in range(9, 16):
-        iv[i] = 0x00
-    
+    IV_FIELDS.pack_into(iv, 0, manufacturer & 0xFFFF, bytes(id_bytes[:4]), access_nr, frame_count & 0xFFFF)
     return iv
 
-def decrypt_aes_cbc_iv(encrypted_data, key, iv=None):
-    """AES-CBC şifresini çöz"""
-    if iv is None:
-        # IV yoksa, genellikle ilk 16 bayt IV olarak kullanılır
-        iv = b'\x00' * 16  # Veya başka bir varsayılan IV
-    
-    cipher = AES.new(key, AES.MODE_CBC, iv)
-    decrypted = cipher.decrypt(encrypted_data)
-    
-    # PKCS#7 padding'i kaldır
-    padding_len = decrypted[-1]
-    if padding_len > 16:
-        return decrypted  # Padding yok
-    
-    return decrypted[:-padding_len]
-
-def encrypt_aes_cbc_iv(plain_data, key, iv):
-    """AES-CBC ile veri şifrele"""
-    # 16 baytın katlarına tamamla (PKCS#7 padding)
-    padding_len = 16 - (len(plain_data) % 16)
-    padded_data = plain_data + bytes([padding_len] * padding_len)
-    
-    cipher = AES.new(key, AES.MODE_CBC, iv)
-    encrypted = cipher.encrypt(padded_data)
+def build_iv(header, access_nr, frame_count=0):
+    """
+    Telgraf başlığından IV oluştur (şifre çözme yolu için calculate_iv karşılığı)
     
-    return encrypted
+    header: Telgrafın M ve A alanları (data[2:8], telgraftaki bayt sırasıyla)
+    access_nr: 1 byte erişim numarası
+    frame_count: 2 byte çerçeve sayısı (opsiyonel)
+    """
+    return IV_LAYOUT.pack(header, access_nr, frame_count & 0xFFFF)
 
 def format_manufacturer_code(code):
     """Üretici kodunu EN 13757-3 formatına dönüştür (ASCII)"""